@@ -2,21 +2,43 @@
 
 import dash_bootstrap_components as dbc
 from dash import Dash, dcc, html, dash_table
-from dash.dependencies import Input, Output
-from dash_bootstrap_templates import load_figure_template
-import plotly.express as px
-import plotly.io as pio
-import plotly.graph_objects as go
-pio.templates.default = "plotly_dark"
-load_figure_template("DARKLY")
+from dash.dependencies import ClientsideFunction, Input, Output, State
+# plotly.express and plotly.graph_objects are imported by the figure builders, so a worker
+# that only serves prerendered outputs never loads them
+import theme
+theme.install()
 import pandas as pd
+from urllib.parse import urlencode
+import dataset
+import settings
+import memo
+from memo import FigureCache
+from pool import FigurePool
+from shared import SharedCache
+import metrics
+import static
+import wire
 
 # --------------------------------------------- define data ---------------------------------------------
 
-df = pd.read_csv('data/races.csv')
-drivers = pd.read_csv('data/drivers.csv')
-year_options = sorted([i for i in df['Year'].unique()])
+df = dataset.load_races()
+drivers = dataset.load_drivers()
+index = dataset.RaceIndex(df)
+summary = dataset.RaceSummary(df)
+# outputs link the image variants of the manifest, so a new manifest invalidates them too, and
+# so does a deploy that changes the callbacks, the data shaping or the figure template
+code_version = memo.fingerprint([__file__, dataset.__file__, wire.__file__], theme.template())
+cache_version = "-".join(filter(None, [dataset.version(), code_version, static.digest("img/manifest.json"), settings.COMPACT_FIGURES and wire.FORMAT]))
+# outputs rendered by any worker on the machine, see shared.py
+shared_cache = SharedCache(settings.SHARED_CACHE, settings.SHARED_CACHE_MB * 2**20, cache_version) if settings.SHARED_CACHE else None
+figure_cache = FigureCache(cache_version, maxsize=settings.FIGURE_CACHE_SIZE, serialize=wire.dumps if settings.COMPACT_FIGURES else None, shared=shared_cache)
+# figure callbacks that miss the cache are built on a bounded pool, see pool.py
+figure_pool = FigurePool(settings.FIGURE_THREADS, queue=settings.FIGURE_QUEUE, timeout=settings.FIGURE_TIMEOUT)
+driver_details = drivers.drop_duplicates('FullName').set_index('FullName')
+year_options = sorted([int(i) for i in df['Year'].unique()])
 driver_options = sorted([i for i in drivers['FullName'].unique() if i not in ['Jack Aitken', 'Nyck De Vries']])
+default_driver = "Carlos Sainz" if "Carlos Sainz" in driver_options else driver_options[0] # other datasets (F1_DATA_DIR) may not have him
+default_year = 2021 if 2021 in year_options else year_options[-1]
 
 # --------------------------------------------- initialise app ---------------------------------------------
 
@@ -24,18 +46,52 @@ app = Dash(__name__, meta_tags=[{"name": "viewport", "content": "width=device-wi
             title = "F1 Driver Stats", update_title='Enabling DRS...', 
             external_stylesheets=[dbc.themes.DARKLY, dbc.icons.FONT_AWESOME])
 server = app.server
+static.init_app(app, compress=settings.COMPRESS)
+metrics.init_app(server, header=settings.TIMING_HEADER)
+metrics.register("figure_cache", figure_cache.stats)
+metrics.register("figure_pool", figure_pool.stats)
+if shared_cache:
+    metrics.register("shared_cache", shared_cache.stats)
+metrics.register("memory", metrics.memory)
 
 # --------------------------------------------- build components ---------------------------------------------
 
-driver_dropdown = dcc.Dropdown(id = "chosen_driver", options = driver_options, value= "Carlos Sainz", clearable = False, className="filter")
-year_dropdown = dcc.Dropdown(id = "chosen_year", options = year_options, value= 2021, clearable = False, style={'margin-bottom': '5%'})
-driver_image= dbc.CardImg(id = "driver-img", src = "assets/profiles/Carlos Sainz.png")
+driver_dropdown = dcc.Dropdown(id = "chosen_driver", options = driver_options, value= default_driver, clearable = False, className="filter")
+year_dropdown = dcc.Dropdown(id = "chosen_year", options = year_options, value= default_year, clearable = False, style={'margin-bottom': '5%'})
+# pictures get AVIF/WebP/png variants sized for the slot they fill, from the images.py manifest
+def srcset(candidates):
+    return ", ".join(f"{url} {width}w" for url, width in candidates)
 
-twitter_feed = html.Iframe(srcDoc=''' <a class="twitter-timeline" data-theme="dark" href="https://twitter.com/Carlossainz55"> Tweets by Carlos Sainz </a> 
-            <script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>''', height=800, width=300, id = "twitter")
+def picture(path, sizes, **img):
+    candidates = static.variants(path)
+    if candidates is None:
+        return [html.Img(src=static.url(path), **img)]
+    return [html.Source(type="image/avif", srcSet=srcset(candidates["avif"]), sizes=sizes),
+        html.Source(type="image/webp", srcSet=srcset(candidates["webp"]), sizes=sizes),
+        html.Img(src=candidates["png"][0][0], srcSet=srcset(candidates["png"]), sizes=sizes, **img)]
+
+PROFILE_SIZES = "33vw"
+FLAG_SIZES = "64px"
+
+def driver_picture(chosen_driver):
+    return picture(f"profiles/{chosen_driver}.png", PROFILE_SIZES, className="card-img", alt=chosen_driver)
+
+def flag_picture(flag):
+    return picture(f"flags/{flag}.png", FLAG_SIZES, alt=flag)
+
+driver_image= html.Picture(id = "driver-img", children = driver_picture(default_driver))
+
+# one frame for every driver: the callback only changes the fragment, which does not reload it,
+# and assets/twitter.html loads widgets.js when the user reaches for it or the page is idle
+TWITTER_FRAME = f"{static.url('twitter.html')}&load={settings.TWITTER_EMBED}"
+
+def twitter_src(chosen_driver, timeline_url):
+    return TWITTER_FRAME + "#" + urlencode({"url": timeline_url, "name": chosen_driver})
+
+twitter_feed = html.Iframe(src=twitter_src(default_driver, driver_details.loc[default_driver, "twitter"]), height=800, width=300, id = "twitter")
 
 driver_info = dbc.CardGroup([
-        html.Img(id = "d_flag", src = "assets/flags/es.png"),
+        html.Picture(id = "d_flag", children = flag_picture(driver_details.loc[default_driver, "FlagURL"])),
         dbc.Card([dbc.CardBody(id = "driver_number", children = [html.H2("55")], className="border-0 bg-transparent")]),
         dbc.Card([dbc.CardBody(id = "team_name", children = [html.H3("Ferrari")], className="border-0 bg-transparent")])
 ], id="kpi_group")
@@ -58,6 +114,22 @@ graph_position_scatter = dcc.Graph(id="scatter", className="graph")
 
 table = dcc.Graph(id="table-container")
 
+graphs = [success_pie_group, dnf_pie_group, graph_overall_progress, graph_season_progress, graph_avg_points, graph_total_points, graph_position_scatter, table]
+
+# the figure template, sent once, for figures drawn or decoded in the browser; the driver rows
+# for the year views in assets/season.js; one store per graph for the compact wire format
+stores = []
+if settings.CLIENTSIDE_SEASON or settings.COMPACT_FIGURES:
+    stores.append(dcc.Store(id="figure_template", data=theme.template()))
+if settings.CLIENTSIDE_SEASON:
+    stores.append(dcc.Store(id="driver_rows"))
+# the AVIF/WebP srcsets of every profile picture, for assets/images.js to preload the next one
+profile_srcsets = {name: {fmt: srcset(candidates[fmt]) for fmt in ("avif", "webp")}
+    for name, candidates in ((name, static.variants(f"profiles/{name}.png")) for name in driver_options) if candidates}
+stores.extend([dcc.Store(id="profile_srcsets", data=profile_srcsets), dcc.Store(id="preloaded")])
+if settings.COMPACT_FIGURES:
+    stores.extend(dcc.Store(id=f"{graph.id}_wire") for graph in graphs)
+
 # --------------------------------------------- app layout ---------------------------------------------
 
 app.layout = dbc.Container(id = "root",
@@ -84,35 +156,27 @@ app.layout = dbc.Container(id = "root",
             ]),
         ]),
         dbc.Row([table])
-    ])
+    ] + stores)
 
 # ----------------------------------------------- IMG AND TWITTER CALLBACKS -------------------------------------------------- #
 
-@app.callback(
-    Output("driver-img", 'src'),
-    Output("d_flag", 'src'),
-    Output("twitter", 'srcDoc'),
-    Input("chosen_driver","value"))
-def update_driver_info(chosen_driver):
-    country = drivers.loc[drivers['FullName'] == chosen_driver]["FlagURL"]
-    country = country.values[0]
-    driver_pic = f"assets/profiles/{chosen_driver}.png"
-    driver_country = f"assets/flags/{country}.png"
-    twitter_url = drivers.loc[drivers['FullName'] == chosen_driver]["twitter"]
-    twitter_url = twitter_url.values[0]
-    twitter_url = str('"'+twitter_url+'"')
-    twitter_link = f'''<a class="twitter-timeline" data-theme="dark" href={twitter_url}> Tweets by Carlos Sainz </a> <script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>'''
+def driver_media(chosen_driver, details):
+    driver_pic = driver_picture(chosen_driver)
+    driver_country = flag_picture(details['FlagURL'])
+    twitter_link = twitter_src(chosen_driver, details["twitter"])
     return driver_pic, driver_country, twitter_link
 
+@metrics.instrument
+@figure_cache.memoize("update_driver_info")
+def update_driver_info(chosen_driver):
+    with metrics.phase("filter"):
+        details = driver_details.loc[chosen_driver]
+    return driver_media(chosen_driver, details)
+
 # ----------------------------------------------- TABLE CALLBACKS -------------------------------------------------- #
 
-@app.callback(
-    Output("table-container", "figure"), 
-    Input("chosen_year","value"), 
-    Input("chosen_driver","value"))
-def display_table(chosen_year, chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
-    driver_year_df = driver_df.loc[driver_df['Year'] == chosen_year]
+def table_figure(driver_year_df, chosen_driver):
+    import plotly.graph_objects as go
     season_summary = driver_year_df[['RoundNumber', 'EventDate', 'GP', 'EventFormat', 'Location', 'QualiStatus', 'GridPosition','ResultType', 'Status', 'Position', 'Points']]
     season_summary['CumulativePoints'] = season_summary['Points'].cumsum()
     fig = go.Figure(data=[go.Table(
@@ -120,21 +184,24 @@ def display_table(chosen_year, chosen_driver):
         values=list(season_summary.columns),
         fill_color='#e45756',align='center'),
     cells=dict(
-        values=[season_summary.RoundNumber, season_summary.EventDate, season_summary.GP, season_summary.EventFormat, season_summary.Location, season_summary.QualiStatus, season_summary.GridPosition, season_summary.ResultType, season_summary.Status, season_summary.Position, season_summary.Points, season_summary.CumulativePoints], 
+        values=[season_summary.RoundNumber, season_summary.EventDate.dt.date, season_summary.GP, season_summary.EventFormat, season_summary.Location, season_summary.QualiStatus, season_summary.GridPosition, season_summary.ResultType, season_summary.Status, season_summary.Position, season_summary.Points, season_summary.CumulativePoints], 
         fill_color = 'rgba(0, 0, 0, 0)', align='center'))])
     fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(0, 0, 0, 0)"})
     fig.update_layout(margin=dict(t=0, b=100, l=0, r=0, pad=0))
     fig.update_layout(title_text=f'Season Summary - {chosen_driver}', title_x=0.5)
     return fig
 
+@metrics.instrument
+@figure_cache.memoize("display_table", pool=figure_pool)
+def display_table(chosen_year, chosen_driver):
+    with metrics.phase("filter"):
+        driver_year_df = index.driver_year(chosen_driver, chosen_year)
+    return table_figure(driver_year_df, chosen_driver)
+
 # ----------------------------------------------- BAR CALLBACKS -------------------------------------------------- #
 
-@app.callback(
-    Output("bar_points_avg", "figure"), 
-    Output("bar_points_total", "figure"),
-    Input("chosen_driver","value"))
-def fig_avg_bar_pts(chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
+def bar_figures(driver_df, chosen_driver):
+    import plotly.express as px
     driver_yr_summary = driver_df.groupby('Year').agg(TotalPoints = pd.NamedAgg(column="Points", aggfunc=sum), TeamName = pd.NamedAgg(column="TeamName", aggfunc=max), TotalRaces = pd.NamedAgg(column="Counter", aggfunc=sum)).reset_index()
     driver_yr_summary["AveragePoints"] = driver_yr_summary.TotalPoints / driver_yr_summary.TotalRaces
     avg_points_figure = px.bar(driver_yr_summary, x='Year', y='AveragePoints', labels = {'Points':'Points', 'Year':'Season'}, color = "TeamName", text_auto=True, opacity=0.9, color_discrete_sequence=px.colors.qualitative.T10)
@@ -149,58 +216,75 @@ def fig_avg_bar_pts(chosen_driver):
     total_points_figure.update_layout(title_text=f'Points by Season - {chosen_driver}', title_x=0.5)
     return avg_points_figure, total_points_figure
 
+@metrics.instrument
+@figure_cache.memoize("fig_avg_bar_pts", pool=figure_pool)
+def fig_avg_bar_pts(chosen_driver):
+    with metrics.phase("filter"):
+        driver_df = index.driver(chosen_driver)
+    return bar_figures(driver_df, chosen_driver)
+
 # ----------------------------------------------- LINE & AREA CALLBACKS  -------------------------------------------------- #
 
-@app.callback(
-    Output("overall_progression", "figure"), 
-    Input("chosen_driver","value"))
-def card_overall_progression(chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
-    fig = px.line(data_frame=driver_df, x="EventDate", y=["Position", "GridPosition"], range_y = [0,20], color_discrete_sequence=px.colors.qualitative.T10)
+def progression_figure(rows, title):
+    import plotly.express as px
+    fig = px.line(data_frame=rows, x="EventDate", y=["Position", "GridPosition"], range_y = [0,20], color_discrete_sequence=px.colors.qualitative.T10)
     fig.update_traces(mode="markers+lines", hovertemplate=None)
     fig.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),hovermode="x", legend_title="",)
     fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(0, 0, 0, 0)"})
-    fig.update_layout(title_text="Overview 2018-2022", title_x=0.5)
+    fig.update_layout(title_text=title, title_x=0.5)
     return fig
 
-@app.callback(
-    Output("season_progression", "figure"), 
-    Input("chosen_year","value"), 
-    Input("chosen_driver","value"))
+@metrics.instrument
+@figure_cache.memoize("card_overall_progression", pool=figure_pool)
+def card_overall_progression(chosen_driver):
+    with metrics.phase("filter"):
+        driver_df = index.driver(chosen_driver)
+    return progression_figure(driver_df, "Overview 2018-2022")
+
+@metrics.instrument
+@figure_cache.memoize("fig_season_progression", pool=figure_pool)
 def fig_season_progression(chosen_year, chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
-    driver_year_df = driver_df.loc[driver_df['Year'] == chosen_year]
-    fig = px.line(data_frame=driver_year_df, x="EventDate", y=["Position", "GridPosition"], range_y = [0,20], color_discrete_sequence=px.colors.qualitative.T10)
-    fig.update_traces(mode="markers+lines", hovertemplate=None)
-    fig.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),hovermode="x", legend_title="",)
-    fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(0, 0, 0, 0)"})
-    fig.update_layout(title_text=f"Overview of {chosen_year} Season", title_x=0.5)
-    return fig
+    with metrics.phase("filter"):
+        driver_year_df = index.driver_year(chosen_driver, chosen_year)
+    return progression_figure(driver_year_df, f"Overview of {chosen_year} Season")
 
 # ----------------------------------------------- SCATTER CALLBACKS -------------------------------------------------- #
 
-@app.callback(
-    Output("scatter", "figure"), 
-    Input("chosen_driver","value"))
-def fig_scatter(chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
-    driver_df["Year"] = driver_df["Year"].astype(str)
-    fig = px.scatter(data_frame = driver_df, x = "GridPosition", y = "Position", range_x = [0,20], range_y = [0,25], color = "TeamName", trendline="ols", trendline_scope= "overall", color_discrete_sequence=px.colors.qualitative.T10)
+def trendline_trace(driver_df, fit, color):
+    import plotly.graph_objects as go
+    # same trace px.scatter(trendline="ols", trendline_scope="overall") adds, from the precomputed fit
+    trace = go.Scatter(name="Overall Trendline", legendgroup="Overall Trendline", showlegend=True, mode="lines", line=dict(color=color), xaxis="x", yaxis="y")
+    points = driver_df[["GridPosition", "Position"]].dropna()
+    if fit is None or len(points) < 2:
+        return trace
+    slope, intercept, rsquared = fit
+    x = points["GridPosition"].sort_values().values
+    trace.update(x=x, y=intercept + slope * x.astype("float64"),
+        hovertemplate="<b>OLS trendline</b><br>Position = %g * GridPosition + %g<br>R<sup>2</sup>=%f<br><br>GridPosition=%%{x}<br>Position=%%{y} <b>(trend)</b><extra></extra>" % (slope, intercept, rsquared))
+    return trace
+
+def scatter_figure(driver_df, chosen_driver):
+    import plotly.express as px
+    colors = px.colors.qualitative.T10
+    fig = px.scatter(data_frame = driver_df, x = "GridPosition", y = "Position", range_x = [0,20], range_y = [0,25], color = "TeamName", color_discrete_sequence=colors)
+    fig.add_trace(trendline_trace(driver_df, summary.trendline(chosen_driver), colors[len(fig.data) % len(colors)]))
     fig.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1), legend_title="",)
     fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(0, 0, 0, 0)"})
     fig.update_layout(title_text="Correlation between Grid Position and Final Result", title_x=0.5)
     return fig
 
+@metrics.instrument
+@figure_cache.memoize("fig_scatter", pool=figure_pool)
+def fig_scatter(chosen_driver):
+    with metrics.phase("filter"):
+        driver_df = index.driver(chosen_driver)
+    return scatter_figure(driver_df, chosen_driver)
+
 # ----------------------------------------------- PIE CALLBACKS -------------------------------------------------- #
 
-@app.callback(
-    Output("card_success", "figure"), 
-    Output("card_dnf", "figure"),
-    Input("chosen_driver","value")
-)
-def update_pies(chosen_driver):
+def pie_figures(driver_df, chosen_driver):
+    import plotly.express as px
 
-    driver_df = df.loc[df['FullName'] == chosen_driver]
     driver_df_dnf = driver_df.query("Status != 'Finished'").query("Status != '+1 Lap'").query("Status != '+2 Laps'")
 
     success = px.pie(driver_df, values='Counter', names='ResultType', title=f'Race Results for Career - {chosen_driver}', color_discrete_sequence=px.colors.qualitative.T10, hole=.3)
@@ -218,33 +302,149 @@ def update_pies(chosen_driver):
 
     return success, dnf
 
+@metrics.instrument
+@figure_cache.memoize("update_pies", pool=figure_pool)
+def update_pies(chosen_driver):
+    with metrics.phase("filter"):
+        driver_df = index.driver(chosen_driver)
+    return pie_figures(driver_df, chosen_driver)
+
 # ----------------------------------------------- CARD CALLBACKS -------------------------------------------------- #
 
-@app.callback(
-    Output("total_career_points_card", "children"), 
-    Output("total_wins", "children"), 
-    Output("highest_position", "children"),
-    Output("team_name", "children"),
-    Output("driver_number", "children"),
-    Input("chosen_driver","value"))
+def card_values(kpis):
+    return kpis["CareerPoints"], kpis["Wins"], kpis["HighestPosition"], kpis["TeamName"], kpis["DriverNumber"]
+
+@metrics.instrument
+@figure_cache.memoize("driver_cards")
 def driver_cards(chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
-    career_points = driver_df["Points"].sum()
-    total_wins = driver_df.query("Position == 1").sum()["Counter"]
-    highest_position = driver_df["Position"].min()
-    team_name = driver_df["TeamName"][driver_df['Year'].idxmax()]
-    driver_number = driver_df["DriverNumber"].values[0]
-    return career_points, total_wins, highest_position, team_name, driver_number
-
-@app.callback(
-    Output("total_season_points_card", "children"), 
-    Input("chosen_year","value"), 
-    Input("chosen_driver","value"))
+    with metrics.phase("filter"):
+        kpis = summary.driver(chosen_driver)
+    return card_values(kpis)
+
+@metrics.instrument
+@figure_cache.memoize("total_season_points_card")
 def total_season_points_card(chosen_year, chosen_driver):
-    driver_df = df.loc[df['FullName'] == chosen_driver]
-    driver_year_df = driver_df.loc[driver_df['Year'] == chosen_year]
-    value = driver_year_df["Points"].sum()
-    return value
+    with metrics.phase("filter"):
+        return summary.season(chosen_driver, chosen_year)
+
+# ----------------------------------------------- CLIENTSIDE SEASON VIEWS -------------------------------------------------- #
+
+# every season of the chosen driver in one columnar payload; the table, season progression
+# and season points are then filtered and drawn in the browser (assets/season.js), so
+# changing the year never reaches the server
+
+SEASON_COLUMNS = ['Year', 'RoundNumber', 'EventDate', 'GP', 'EventFormat', 'Location', 'QualiStatus', 'GridPosition', 'ResultType', 'Status', 'Position', 'Points']
+
+def season_rows(driver_df, chosen_driver):
+    rows = driver_df[SEASON_COLUMNS].assign(EventDate=driver_df['EventDate'].dt.strftime('%Y-%m-%d'))
+    return {"driver": chosen_driver, "columns": {column: rows[column].tolist() for column in SEASON_COLUMNS}}
+
+@metrics.instrument
+@figure_cache.memoize("driver_rows")
+def driver_rows(chosen_driver):
+    with metrics.phase("filter"):
+        driver_df = index.driver(chosen_driver)
+    return season_rows(driver_df, chosen_driver)
+
+# ----------------------------------------------- BATCHED CALLBACKS -------------------------------------------------- #
+
+# one request per dropdown change instead of one per callback: the driver's rows are taken
+# once and every output that depends on them is built from the same frame
+
+@metrics.instrument
+@figure_cache.memoize("update_driver", pool=figure_pool)
+def update_driver(chosen_driver):
+    with metrics.phase("filter"):
+        driver_df = index.driver(chosen_driver)
+        details = driver_details.loc[chosen_driver]
+        kpis = summary.driver(chosen_driver)
+    return (*driver_media(chosen_driver, details), *card_values(kpis), *pie_figures(driver_df, chosen_driver),
+        *bar_figures(driver_df, chosen_driver), progression_figure(driver_df, "Overview 2018-2022"), scatter_figure(driver_df, chosen_driver))
+
+@metrics.instrument
+@figure_cache.memoize("update_season", pool=figure_pool)
+def update_season(chosen_year, chosen_driver):
+    with metrics.phase("filter"):
+        driver_year_df = index.driver_year(chosen_driver, chosen_year)
+        season_points = summary.season(chosen_driver, chosen_year)
+    return table_figure(driver_year_df, chosen_driver), progression_figure(driver_year_df, f"Overview of {chosen_year} Season"), season_points
+
+# ----------------------------------------------- CALLBACK REGISTRATION -------------------------------------------------- #
+
+DRIVER = Input("chosen_driver","value")
+YEAR = Input("chosen_year","value")
+
+OUTPUTS = {
+    "update_driver_info": [Output("driver-img", 'children'), Output("d_flag", 'children'), Output("twitter", 'src')],
+    "driver_cards": [Output("total_career_points_card", "children"), Output("total_wins", "children"), Output("highest_position", "children"),
+        Output("team_name", "children"), Output("driver_number", "children")],
+    "update_pies": [Output("card_success", "figure"), Output("card_dnf", "figure")],
+    "fig_avg_bar_pts": [Output("bar_points_avg", "figure"), Output("bar_points_total", "figure")],
+    "card_overall_progression": [Output("overall_progression", "figure")],
+    "fig_scatter": [Output("scatter", "figure")],
+    "display_table": [Output("table-container", "figure")],
+    "fig_season_progression": [Output("season_progression", "figure")],
+    "total_season_points_card": [Output("total_season_points_card", "children")],
+}
+# callbacks folded into update_driver and update_season, in the order those return their outputs
+DRIVER_CALLBACKS = ["update_driver_info", "driver_cards", "update_pies", "fig_avg_bar_pts", "card_overall_progression", "fig_scatter"]
+SEASON_CALLBACKS = ["display_table", "fig_season_progression", "total_season_points_card"]
+
+wired = []
+gated = []
+
+def register(func, outputs, inputs, prevent_initial_call=False):
+    if settings.COMPACT_FIGURES:
+        # figures go to the graph's wire store; assets/wire.js decodes them into the graph
+        wired.extend(output.component_id for output in outputs if output.component_property == "figure")
+        outputs = [Output(f"{output.component_id}_wire", "data") if output.component_property == "figure" else output for output in outputs]
+    app.callback(outputs[0] if len(outputs) == 1 else outputs, inputs, prevent_initial_call=prevent_initial_call)(func)
+
+def register_lazily(func, outputs, inputs):
+    # callbacks that only draw graphs wait until their first graph has been seen: the clientside
+    # gate passes the inputs on to the graph's store once the sentinel was clicked, and only
+    # then does the server get a request
+    graph = outputs[0].component_id
+    if not settings.LAZY_GRAPHS or not all(output.component_property == "figure" for output in outputs):
+        return register(func, outputs, inputs)
+    gated.append(graph)
+    app.clientside_callback(ClientsideFunction(namespace="lazy", function_name="gate"),
+        Output(f"{graph}_inputs", "data"), [Input(f"{graph}_seen", "n_clicks")] + inputs)
+    def lazy_callback(values):
+        return func(*values)
+    register(lazy_callback, outputs, [Input(f"{graph}_inputs", "data")], prevent_initial_call=True)
+
+if settings.BATCHED_CALLBACKS:
+    register(update_driver, [output for name in DRIVER_CALLBACKS for output in OUTPUTS[name]], [DRIVER])
+else:
+    for name in DRIVER_CALLBACKS:
+        register_lazily(globals()[name], OUTPUTS[name], [DRIVER])
+
+if settings.CLIENTSIDE_SEASON:
+    register(driver_rows, [Output("driver_rows", "data")], [DRIVER])
+    app.clientside_callback(ClientsideFunction(namespace="season", function_name="views"),
+        [output for name in SEASON_CALLBACKS for output in OUTPUTS[name]], [YEAR, Input("driver_rows", "data")], [State("figure_template", "data")])
+elif settings.BATCHED_CALLBACKS:
+    register(update_season, [output for name in SEASON_CALLBACKS for output in OUTPUTS[name]], [YEAR, DRIVER])
+else:
+    for name in SEASON_CALLBACKS:
+        register_lazily(globals()[name], OUTPUTS[name], [YEAR, DRIVER])
+
+app.clientside_callback(ClientsideFunction(namespace="images", function_name="preload"),
+    Output("preloaded", "data"), DRIVER, State("chosen_driver", "options"), State("profile_srcsets", "data"), State("preloaded", "data"))
+
+for graph in wired:
+    app.clientside_callback(ClientsideFunction(namespace="wire", function_name="figure"),
+        Output(graph, "figure"), Input(f"{graph}_wire", "data"), State("figure_template", "data"))
+
+# a hidden sentinel per gated graph that assets/lazy.js clicks once the graph is in view, and the
+# store the graph's callback reads its inputs from once that happened
+for graph in gated:
+    app.layout.children.extend([html.Div(id=f"{graph}_seen", className="lazy-sentinel", hidden=True), dcc.Store(id=f"{graph}_inputs")])
+
+# ----------------------------------------------- PRERENDERED OUTPUTS -------------------------------------------------- #
+
+figure_cache.load_prerendered(settings.PRERENDERED)
 
 # --------------------------------------------- run server ---------------------------------------------
 
@@ -0,0 +1,47 @@
+// --------------------------------------------- profile picture preloading ---------------------------------------------
+//
+// After a driver change, loads the pictures of the drivers next to it in the dropdown, the
+// likely next choice, into a hidden <picture> so the browser picks the same AVIF/WebP
+// candidate the card will ask for and has it cached when that driver is chosen.
+
+var PRELOAD_SIZES = "33vw";
+
+function preloadPicture(holder, srcsets) {
+    var picture = document.createElement("picture");
+    ["avif", "webp"].forEach(function (format) {
+        var source = document.createElement("source");
+        source.type = "image/" + format;
+        source.sizes = PRELOAD_SIZES;
+        source.srcset = srcsets[format];
+        picture.appendChild(source);
+    });
+    var img = document.createElement("img");
+    img.sizes = PRELOAD_SIZES;
+    img.className = "card-img";
+    picture.appendChild(img);
+    holder.appendChild(picture);
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    images: {
+        preload: function (driver, options, pictures, preloaded) {
+            var names = (options || []).map(function (option) { return typeof option === "string" ? option : option.value; });
+            var position = names.indexOf(driver);
+            var holder = document.getElementById("preloaded-pictures");
+            if (!holder) {
+                holder = document.createElement("div");
+                holder.id = "preloaded-pictures";
+                holder.style.display = "none";
+                document.body.appendChild(holder);
+            }
+            var done = preloaded || [];
+            [names[position + 1], names[position - 1]].forEach(function (name) {
+                if (name && pictures[name] && done.indexOf(name) === -1) {
+                    preloadPicture(holder, pictures[name]);
+                    done = done.concat([name]);
+                }
+            });
+            return done;
+        }
+    }
+});
@@ -0,0 +1,60 @@
+// --------------------------------------------- lazy graphs ---------------------------------------------
+//
+// With F1_LAZY_GRAPHS every graph drawn behind a gate (the first graph of a callback that only
+// draws graphs) has a hidden sentinel, <graph id>_seen. The callback waits until the sentinel
+// has been clicked, which happens here once the graph comes within LAZY_MARGIN of the viewport. Graphs never scrolled to are loaded one at a
+// time once the page has settled (IDLE_DELAY) and the browser is idle.
+
+var LAZY_MARGIN = "200px";
+var IDLE_DELAY = 3000;
+var lazyWatching = false;
+
+function watchLazyGraphs() {
+    var pending = Array.from(document.getElementsByClassName("lazy-sentinel"));
+    function reveal(sentinel) {
+        var position = pending.indexOf(sentinel);
+        if (position !== -1) {
+            pending.splice(position, 1);
+            sentinel.click();
+        }
+    }
+    var observer = new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                reveal(document.getElementById(entry.target.id + "_seen"));
+            }
+        });
+    }, {rootMargin: LAZY_MARGIN});
+    pending.slice().forEach(function (sentinel) {
+        var graph = document.getElementById(sentinel.id.slice(0, -"_seen".length));
+        if (graph) {
+            observer.observe(graph);
+        } else {
+            reveal(sentinel);
+        }
+    });
+    var idle = window.requestIdleCallback || function (callback) { return setTimeout(callback, 200); };
+    setTimeout(function next() {
+        if (pending.length) {
+            reveal(pending[0]);
+            idle(next);
+        }
+    }, IDLE_DELAY);
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    lazy: {
+        gate: function (seen) {
+            if (!lazyWatching) {
+                // the first gate runs once the layout is on the page
+                lazyWatching = true;
+                setTimeout(watchLazyGraphs, 0);
+            }
+            if (!seen) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return Array.prototype.slice.call(arguments, 1);
+        }
+    }
+});
@@ -0,0 +1,64 @@
+// --------------------------------------------- clientside season views ---------------------------------------------
+//
+// With F1_CLIENTSIDE_SEASON the server sends every season of the chosen driver once (driver_rows
+// in app.py); the table, season progression and season points are filtered and drawn here, with
+// the same figures display_table, fig_season_progression and total_season_points_card return.
+
+var T10 = ["#4C78A8", "#F58518"];
+var TRANSPARENT = "rgba(0, 0, 0, 0)";
+var TABLE_COLUMNS = ["RoundNumber", "EventDate", "GP", "EventFormat", "Location", "QualiStatus", "GridPosition", "ResultType", "Status", "Position", "Points"];
+
+function seasonRows(columns, year) {
+    var keep = [];
+    columns.Year.forEach(function (value, i) { if (value === year) keep.push(i); });
+    var rows = {};
+    Object.keys(columns).forEach(function (column) {
+        rows[column] = keep.map(function (i) { return columns[column][i]; });
+    });
+    return rows;
+}
+
+function cumulative(values) {
+    var total = 0;
+    return values.map(function (value) { total += value; return total; });
+}
+
+function seasonTable(rows, driver, template) {
+    var header = TABLE_COLUMNS.concat(["CumulativePoints"]);
+    var cells = TABLE_COLUMNS.map(function (column) { return rows[column]; }).concat([cumulative(rows.Points)]);
+    return {
+        data: [{type: "table", header: {values: header, fill: {color: "#e45756"}, align: "center"},
+            cells: {values: cells, fill: {color: TRANSPARENT}, align: "center"}}],
+        layout: {template: template, plot_bgcolor: TRANSPARENT, paper_bgcolor: TRANSPARENT,
+            margin: {t: 0, b: 100, l: 0, r: 0, pad: 0}, title: {text: "Season Summary - " + driver, x: 0.5}}
+    };
+}
+
+function seasonProgression(rows, year, template) {
+    // like px.line, a season without races has no traces at all
+    var data = rows.Year.length === 0 ? [] : ["Position", "GridPosition"].map(function (column, i) {
+        return {type: "scatter", mode: "markers+lines", name: column, legendgroup: column, showlegend: true, orientation: "v",
+            line: {color: T10[i], dash: "solid"}, marker: {symbol: "circle"}, x: rows.EventDate, y: rows[column], xaxis: "x", yaxis: "y"};
+    });
+    return {
+        data: data,
+        layout: {template: template, xaxis: {anchor: "y", domain: [0, 1], title: {text: "EventDate"}},
+            yaxis: {anchor: "x", domain: [0, 1], title: {text: "value"}, range: [0, 20]},
+            legend: {title: {text: ""}, tracegroupgap: 0, orientation: "h", yanchor: "bottom", y: 1.02, xanchor: "right", x: 1},
+            margin: {t: 60}, hovermode: "x", plot_bgcolor: TRANSPARENT, paper_bgcolor: TRANSPARENT,
+            title: {text: "Overview of " + year + " Season", x: 0.5}}
+    };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    season: {
+        views: function (year, payload, template) {
+            if (!payload) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var rows = seasonRows(payload.columns, year);
+            var points = rows.Points.reduce(function (total, value) { return total + value; }, 0);
+            return [seasonTable(rows, payload.driver, template), seasonProgression(rows, year, template), points];
+        }
+    }
+});
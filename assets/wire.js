@@ -0,0 +1,45 @@
+// --------------------------------------------- compact figure wire format ---------------------------------------------
+//
+// Decodes the figures wire.py encodes when F1_COMPACT_FIGURES is set: typed arrays and
+// dictionary-encoded strings go back to plain arrays, and the template sent once with the
+// layout (figure_template) is put back into every figure.
+
+var WIRE_TYPES = {i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array, i4: Int32Array, f4: Float32Array, f8: Float64Array};
+
+function wireArray(spec) {
+    if (spec.dtype === "dict") {
+        return wireArray(spec.codes).map(function (code) { return spec.values[code]; });
+    }
+    var binary = atob(spec.bdata);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return Array.from(new WIRE_TYPES[spec.dtype](bytes.buffer), function (value) { return isNaN(value) ? null : value; });
+}
+
+function wireValue(value) {
+    if (Array.isArray(value)) {
+        return value.map(wireValue);
+    }
+    if (value === null || typeof value !== "object") {
+        return value;
+    }
+    if (typeof value.dtype === "string" && ("bdata" in value || "codes" in value)) {
+        return wireArray(value);
+    }
+    var decoded = {};
+    Object.keys(value).forEach(function (key) { decoded[key] = wireValue(value[key]); });
+    return decoded;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    wire: {
+        figure: function (encoded, template) {
+            if (!encoded) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return {data: wireValue(encoded.data), layout: Object.assign({}, encoded.layout, {template: template})};
+        }
+    }
+});
@@ -0,0 +1,125 @@
+# --------------------------------------------- callback benchmark ---------------------------------------------
+#
+# Times every cached callback of app.py, uncached, for every driver in driver_options and
+# every year in year_options, and reports p50/p95/p99 latency, allocations (tracemalloc, in
+# a separate pass so it does not skew the timings) and the serialised output size.
+#
+#   python benchmarks/bench_callbacks.py --json bench.json
+#   python benchmarks/bench_callbacks.py --scale 10 --limit 5 --compare bench.json
+#
+# --scale N replicates data/races.csv N times before app.py loads it: "drivers" adds renamed
+# copies of every driver (per-driver rows stay the same, the table grows), "seasons" shifts
+# copies into earlier years (every driver's career grows too).
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+def replicate(source_dir, target_dir, scale, mode):
+    races = pd.read_csv(os.path.join(source_dir, "races.csv"))
+    drivers = pd.read_csv(os.path.join(source_dir, "drivers.csv"))
+    race_copies, driver_copies = [races], [drivers]
+    span = races["Year"].max() - races["Year"].min() + 1
+    for copy in range(1, scale):
+        if mode == "drivers":
+            race_copies.append(races.assign(FullName=races["FullName"] + f" {copy}"))
+            driver_copies.append(drivers.assign(FullName=drivers["FullName"] + f" {copy}"))
+        else:
+            race_copies.append(races.assign(Year=races["Year"] - span * copy))
+    pd.concat(race_copies).to_csv(os.path.join(target_dir, "races.csv"), index=False)
+    pd.concat(driver_copies).to_csv(os.path.join(target_dir, "drivers.csv"), index=False)
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+def bench(func, calls, repeat, to_json):
+    timings, sizes, allocations = [], [], []
+    for args in calls:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(to_json(func(*args))))
+    for args in calls:
+        tracemalloc.start()
+        func(*args)
+        allocations.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return {"calls": len(timings), "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(percentile(timings, 0.5), 3), "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3), "alloc_peak_kb_mean": round(statistics.mean(allocations), 1),
+        "bytes_mean": round(statistics.mean(sizes)), "bytes_max": max(sizes)}
+
+def compare(results, baseline, threshold):
+    # callbacks whose p95 grew by more than `threshold` (fraction) against a previous run
+    regressions = []
+    for name, stats in results["callbacks"].items():
+        before = baseline["callbacks"].get(name)
+        if before and stats["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every app.py callback.")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"), help="dataset to load (e.g. a synthetic one)")
+    parser.add_argument("--scale", type=int, default=1, help="replicate the races this many times")
+    parser.add_argument("--scale-mode", choices=["drivers", "seasons"], default="drivers")
+    parser.add_argument("--repeat", type=int, default=3, help="timed calls per input")
+    parser.add_argument("--limit", type=int, help="only the first N drivers of driver_options")
+    parser.add_argument("--callback", action="append", help="only these callbacks (repeatable)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="previous --json output; exit 1 if a p95 regressed")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p95 growth for --compare")
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data_dir)
+    if args.scale > 1:
+        data_dir = tempfile.mkdtemp(prefix="f1-bench-")
+        replicate(os.path.abspath(args.data_dir), data_dir, args.scale, args.scale_mode)
+    os.environ["F1_DATA_DIR"] = data_dir
+    os.environ["F1_PRERENDERED"] = os.path.join(data_dir, "no-prerendered-outputs")
+    os.chdir(ROOT)
+    warnings.simplefilter("ignore")
+
+    start = time.perf_counter()
+    import app
+    import prerender
+    from plotly.io.json import to_json_plotly
+    import_seconds = time.perf_counter() - start
+
+    drivers = app.driver_options[:args.limit] if args.limit else app.driver_options
+    results = {"meta": {"data_dir": data_dir, "scale": args.scale, "scale_mode": args.scale_mode, "rows": len(app.df),
+        "drivers": len(app.driver_options), "years": len(app.year_options), "dataset_version": app.figure_cache.version,
+        "import_s": round(import_seconds, 3), "python": platform.python_version(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "callbacks": {}}
+    print(f"{len(app.df)} rows, {len(app.driver_options)} drivers, {len(app.year_options)} years, app import {import_seconds:.2f}s")
+    print(f"{'callback':<26} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'alloc KB':>9} {'bytes':>8}")
+    for name, func in app.figure_cache.functions.items():
+        if args.callback and name not in args.callback:
+            continue
+        stats = bench(func, list(prerender.arguments(func, drivers)), args.repeat, to_json_plotly)
+        results["callbacks"][name] = stats
+        print(f"{name:<26} {stats['calls']:>6} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['alloc_peak_kb_mean']:>9} {stats['bytes_mean']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,71 @@
+# --------------------------------------------- cold start ---------------------------------------------
+#
+# How long a fresh worker takes to import app.py, from `python -X importtime` in a new
+# interpreter per run: the wall time of `import app`, the import time per top-level package
+# (self time of all its modules) and the slowest modules. Fails (exit status 1) when the median
+# exceeds the cold-start budget, so a change that pulls a heavy import back into start-up shows
+# up here rather than in deploy times.
+#
+#   python benchmarks/bench_importtime.py --repeat 5 --json importtime.json
+#   python benchmarks/bench_importtime.py --budget-ms 300 --top 30
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+BUDGET_MS = 450
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+PROBE = "import time; start = time.perf_counter(); import app; print((time.perf_counter() - start) * 1000)"
+
+def run():
+    out = subprocess.run([sys.executable, "-X", "importtime", "-W", "ignore", "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in out.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            modules[match.group(4)] = {"self_ms": int(match.group(1)) / 1000, "cumulative_ms": int(match.group(2)) / 1000}
+    return float(out.stdout.strip().splitlines()[-1]), modules
+
+def packages(modules):
+    totals = {}
+    for name, entry in modules.items():
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + entry["self_ms"]
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time profile of app.py against a cold-start budget.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages and modules to list")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="fail when the median `import app` takes longer")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    runs = [run() for _ in range(args.repeat)]
+    total = statistics.median(wall for wall, _ in runs)
+    # per-module numbers from the run closest to the median
+    modules = min(runs, key=lambda r: abs(r[0] - total))[1]
+    by_package = sorted(packages(modules).items(), key=lambda item: -item[1])
+    slowest = sorted(modules.items(), key=lambda item: -item[1]["self_ms"])
+
+    print(f"import app: median {total:.0f} ms over {args.repeat} runs (min {min(w for w, _ in runs):.0f}, max {max(w for w, _ in runs):.0f}), budget {args.budget_ms:.0f} ms")
+    print(f"\n{'package':<40} {'self ms':>9}")
+    for package, ms in by_package[:args.top]:
+        print(f"{package:<40} {ms:>9.1f}")
+    print(f"\n{'module':<60} {'self ms':>9} {'cumul ms':>9}")
+    for name, entry in slowest[:args.top]:
+        print(f"{name[:60]:<60} {entry['self_ms']:>9.1f} {entry['cumulative_ms']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"median_ms": round(total, 1), "runs_ms": [round(w, 1) for w, _ in runs], "budget_ms": args.budget_ms,
+                "packages_ms": {package: round(ms, 2) for package, ms in by_package}, "modules": modules}, f, indent=2)
+    if total > args.budget_ms:
+        print(f"\nover the cold-start budget by {total - args.budget_ms:.0f} ms")
+        sys.exit(1)
@@ -0,0 +1,70 @@
+# --------------------------------------------- ingestion scaling benchmark ---------------------------------------------
+#
+# Compares the old "append onto the accumulated frame" loop with data.FrameBuilder as
+# seasons are added. Session frames are cut from data/races.csv and relabelled as extra
+# seasons, so no fastf1 cache or network access is needed.
+#
+#   python benchmarks/bench_ingest.py --seasons 5 10 20 40 75 --json bench_ingest.json
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from data import FrameBuilder, RESULT_COLUMNS
+
+def session_frames(races, seasons):
+    # one results frame per (year, gp), repeated until `seasons` seasons exist
+    columns = [c for c in RESULT_COLUMNS if c not in ('Year', 'GP')]
+    base = [(gp, frame[columns].reset_index(drop=True)) for (_, gp), frame in races.groupby(['Year', 'GP'], sort=False)]
+    per_season = len(base) / races['Year'].nunique()
+    count = int(per_season * seasons)
+    return [(1950 + i // int(per_season), base[i % len(base)][0], base[i % len(base)][1]) for i in range(count)]
+
+def accumulate_append(frames):
+    historical_races = pd.DataFrame(columns=RESULT_COLUMNS)
+    for year, gp, temp_df in frames:
+        temp_df = temp_df.assign(Year=str(year), GP=str(gp))
+        historical_races = pd.concat([historical_races, temp_df], ignore_index=True)
+    return historical_races
+
+def accumulate_builder(frames):
+    historical_races = FrameBuilder(RESULT_COLUMNS)
+    for year, gp, temp_df in frames:
+        historical_races.add(temp_df, Year=str(year), GP=str(gp))
+    return historical_races.build()
+
+def measure(fn, frames):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(frames)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2), "rows": len(result)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory of race frame accumulation as seasons grow.")
+    parser.add_argument("--races", default="data/races.csv")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[5, 10, 20, 40, 75])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    races = pd.read_csv(args.races)
+    results = []
+    print(f"{'seasons':>8} {'rows':>8} {'append s':>10} {'append MB':>10} {'builder s':>10} {'builder MB':>11}")
+    for seasons in args.seasons:
+        frames = session_frames(races, seasons)
+        append = measure(accumulate_append, frames)
+        builder = measure(accumulate_builder, frames)
+        results.append({"seasons": seasons, "sessions": len(frames), "append": append, "builder": builder})
+        print(f"{seasons:>8} {builder['rows']:>8} {append['seconds']:>10} {append['peak_mb']:>10} {builder['seconds']:>10} {builder['peak_mb']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,70 @@
+# --------------------------------------------- per-worker memory ---------------------------------------------
+#
+# Starts `gunicorn app:server` with and without F1_PRELOAD, warms every worker up with a short
+# load test (benchmarks/loadtest.py) and reads /proc/<pid>/smaps_rollup of the master and each
+# worker. USS is the memory only that process holds, so the mean worker USS is what one more
+# worker costs; the total PSS is what the whole server costs. Linux only.
+#
+#   python benchmarks/bench_memory.py --workers 4 --json memory.json
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+import loadtest
+
+sys.path.insert(0, loadtest.ROOT)
+from metrics import memory  # noqa: E402
+
+def workers(master):
+    # gunicorn's workers are the master's children
+    found = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == master:
+            found.append(int(pid))
+    return sorted(found)
+
+def measure(preload, args):
+    os.environ["F1_PRELOAD"] = "1" if preload else "0"
+    process, url = loadtest.start_server(args.workers, args.threads, None, [])
+    try:
+        options = argparse.Namespace(browser_cache=False, image_width=480, preload=False, neighbours=0.0, scroll=1.0)
+        loadtest.run(url, args.users, args.warmup, 10, 0.0, {}, 0, options)
+        time.sleep(0.5)
+        return {"master": memory(process.pid), "workers": [memory(pid) for pid in workers(process.pid)]}
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of gunicorn with and without --preload.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--users", type=int, default=8, help="simulated users of the warm-up load test")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds of load before measuring")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'mode':>10} {'process':>8} {'pid':>8} {'rss MB':>8} {'pss MB':>8} {'uss MB':>8} {'shared MB':>10}")
+    for preload in (False, True):
+        mode = "preload" if preload else "plain"
+        processes = measure(preload, args)
+        for role, entry in [("master", processes["master"])] + [("worker", entry) for entry in processes["workers"]]:
+            print(f"{mode:>10} {role:>8} {entry['pid']:>8} {entry['rss_mb']:>8.1f} {entry['pss_mb']:>8.1f} {entry['uss_mb']:>8.1f} {entry['shared_mb']:>10.1f}")
+        total_pss = processes["master"]["pss_mb"] + sum(entry["pss_mb"] for entry in processes["workers"])
+        worker_uss = sum(entry["uss_mb"] for entry in processes["workers"]) / len(processes["workers"])
+        print(f"{mode:>10} total pss {total_pss:.1f} MB, mean worker uss {worker_uss:.1f} MB")
+        results[mode] = dict(processes, total_pss_mb=round(total_pss, 2), mean_worker_uss_mb=round(worker_uss, 2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,66 @@
+# --------------------------------------------- dataset load benchmark ---------------------------------------------
+#
+# Cold-load time and resident memory of the race and driver data as app.py loads them,
+# each measured in a fresh interpreter so nothing is shared between runs:
+#
+#   csv      - pd.read_csv with no dtypes (how app.py used to start)
+#   csv typed - the csv parsed into the dataset.py schema (fallback when no feather files exist)
+#   feather  - the typed feather files written by data.py
+#
+#   python benchmarks/bench_startup.py --repeat 5 --json bench_startup.json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+LOADERS = {
+    "csv": "races = pd.read_csv(os.path.join(d, 'races.csv')); drivers = pd.read_csv(os.path.join(d, 'drivers.csv'))",
+    "csv typed": "races = dataset.typed_races(pd.read_csv(os.path.join(d, 'races.csv'))); drivers = dataset.typed_drivers(pd.read_csv(os.path.join(d, 'drivers.csv')))",
+    "feather": "races = pd.read_feather(os.path.join(d, 'races.feather')); drivers = pd.read_feather(os.path.join(d, 'drivers.feather'))",
+}
+
+PROBE = """
+import json, os, sys, time
+import pandas as pd, pyarrow.feather
+import dataset
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+d = sys.argv[1]
+before = rss()
+start = time.perf_counter()
+{loader}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_mb": (rss() - before) / 2**20,
+    "frame_mb": (races.memory_usage(deep=True).sum() + drivers.memory_usage(deep=True).sum()) / 2**20}}))
+"""
+
+def run(loader, data_dir):
+    out = subprocess.run([sys.executable, "-c", PROBE.format(loader=loader), data_dir],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cold-load time and memory of the csv and feather datasets.")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'format':>10} {'load ms':>9} {'rss MB':>8} {'frame MB':>9}")
+    for name, loader in LOADERS.items():
+        runs = [run(loader, os.path.abspath(args.data_dir)) for _ in range(args.repeat)]
+        results[name] = {key: round(statistics.median(r[key] for r in runs), 4) for key in runs[0]}
+        print(f"{name:>10} {results[name]['seconds'] * 1000:>9.1f} {results[name]['rss_mb']:>8.2f} {results[name]['frame_mb']:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,70 @@
+# --------------------------------------------- wire format benchmark ---------------------------------------------
+#
+# Renders every cached callback of app.py for every driver and year and compares the response
+# size of the plain plotly JSON with the compact wire format (wire.py), raw and gzipped.
+#
+#   python benchmarks/bench_wire.py --json wire.json
+#   python benchmarks/bench_wire.py --data-dir /tmp/f1-synthetic --limit 5
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+def sizes(blob):
+    data = blob.encode()
+    return len(data), len(gzip.compress(data, 6))
+
+def measure(func, calls, to_json, dumps):
+    plain = compact = plain_gz = compact_gz = encode_ms = 0
+    for args in calls:
+        value = func(*args)
+        size, size_gz = sizes(to_json(value))
+        start = time.perf_counter()
+        blob = dumps(value)
+        encode_ms += (time.perf_counter() - start) * 1000
+        compact_size, compact_gz_size = sizes(blob)
+        plain, plain_gz = plain + size, plain_gz + size_gz
+        compact, compact_gz = compact + compact_size, compact_gz + compact_gz_size
+    return {"calls": len(calls), "plain_bytes_mean": round(plain / len(calls)), "compact_bytes_mean": round(compact / len(calls)),
+        "reduction": round(1 - compact / plain, 3), "plain_gzip_bytes_mean": round(plain_gz / len(calls)),
+        "compact_gzip_bytes_mean": round(compact_gz / len(calls)), "gzip_reduction": round(1 - compact_gz / plain_gz, 3),
+        "encode_ms_mean": round(encode_ms / len(calls), 3)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare plain and compact callback payload sizes.")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"), help="dataset to load (e.g. a synthetic one)")
+    parser.add_argument("--limit", type=int, help="only the first N drivers")
+    parser.add_argument("--callback", action="append", help="only these callbacks (repeatable)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    os.environ["F1_DATA_DIR"] = args.data_dir
+    os.environ["F1_PRERENDERED"] = os.path.join(args.data_dir, "no-prerendered-outputs")
+    warnings.filterwarnings("ignore")
+    os.chdir(ROOT)
+    import app
+    import prerender
+    import wire
+    from plotly.io.json import to_json_plotly
+
+    drivers = app.driver_options[:args.limit] if args.limit else app.driver_options
+    results = {}
+    for name, func in app.figure_cache.functions.items():
+        if args.callback and name not in args.callback:
+            continue
+        results[name] = measure(func, list(prerender.arguments(func, drivers)), to_json_plotly, wire.dumps)
+
+    print(f"{'callback':<26} {'calls':>6} {'plain KB':>9} {'wire KB':>9} {'saved':>7} {'plain gz':>9} {'wire gz':>9} {'saved':>7} {'enc ms':>7}")
+    for name, stats in results.items():
+        print(f"{name:<26} {stats['calls']:>6} {stats['plain_bytes_mean'] / 1024:>9.1f} {stats['compact_bytes_mean'] / 1024:>9.1f} {stats['reduction']:>7.1%}"
+            f" {stats['plain_gzip_bytes_mean'] / 1024:>9.1f} {stats['compact_gzip_bytes_mean'] / 1024:>9.1f} {stats['gzip_reduction']:>7.1%} {stats['encode_ms_mean']:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"data_dir": args.data_dir, "drivers": len(drivers), "callbacks": results}, f, indent=2)
@@ -0,0 +1,362 @@
+# --------------------------------------------- HTTP load test ---------------------------------------------
+#
+# Replays dashboard sessions against a running `app:server` with concurrent simulated users.
+# Every user loads the page (index, layout, dependencies, assets), fires the initial callbacks,
+# then keeps changing driver and year the way the browser would: one _dash-update-component
+# POST per callback that listens to the changed dropdown, plus the profile picture and flag
+# the driver change points at. Callbacks are discovered from /_dash-dependencies, so the
+# payloads always match the running app. Only the standard library is used.
+#
+# Bytes are counted as received, i.e. compressed when --accept-encoding asks for it. With
+# --browser-cache every user keeps a cache like a browser's between its sessions: immutable
+# responses are not requested again and others are revalidated with If-None-Match.
+#
+# Pictures are fetched like a browser that supports AVIF: from <picture> outputs the first
+# <source>'s srcset candidate for --image-width pixels. "driver change to image" times a driver
+# change from its callback to the new profile picture. --preload also fetches the pictures the
+# page preloads (the drivers next to the chosen one, see assets/images.js), and with
+# --neighbours a share of the driver changes step to the next or previous driver, as arrow keys do.
+#
+# With F1_LAZY_GRAPHS the graph callbacks wait behind a clientside gate until the graph is seen
+# (assets/lazy.js). Each session the user sees a graph with probability --scroll, either by
+# scrolling to it or by staying until the page loads it while idle; unseen graphs are never
+# requested. "page to first paint" times the page load up to the callbacks that are not gated.
+#
+#   python benchmarks/loadtest.py --start --workers 2 --threads 4 --users 16 --duration 30
+#   python benchmarks/loadtest.py --url http://127.0.0.1:8050 --users 8 --json load.json
+#   python benchmarks/loadtest.py --start --accept-encoding "br, gzip" --browser-cache --json wire.json
+#   python benchmarks/loadtest.py --start --browser-cache --preload --neighbours 0.5
+#   F1_LAZY_GRAPHS=1 python benchmarks/loadtest.py --start --scroll 0.3
+
+import argparse
+import gzip
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# --------------------------------------------- server ---------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workers, threads, worker_class, extra):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "app:server", "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+        "--threads", str(threads), "--log-level", "warning"] + (["--worker-class", worker_class] if worker_class else []) + extra
+    process = subprocess.Popen(command, cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            urllib.request.urlopen(url + "/_dash-layout", timeout=1).read()
+            return process, url
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("gunicorn did not come up")
+
+# --------------------------------------------- results ---------------------------------------------
+
+class Results:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.cached = {}
+
+    def add(self, label, seconds, size, ok):
+        with self.lock:
+            entry = self.samples.setdefault(label, {"latencies": [], "bytes": 0, "errors": 0})
+            entry["latencies"].append(seconds * 1000)
+            entry["bytes"] += size
+            entry["errors"] += 0 if ok else 1
+
+    def hit(self, label):
+        # served from the simulated browser cache without a request
+        with self.lock:
+            self.cached[label] = self.cached.get(label, 0) + 1
+
+    def summary(self, elapsed):
+        def pct(values, p):
+            return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+        report = {}
+        for label, entry in sorted(self.samples.items()):
+            latencies = sorted(entry["latencies"])
+            report[label] = {"requests": len(latencies), "errors": entry["errors"],
+                "error_rate": round(entry["errors"] / len(latencies), 4), "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": pct(latencies, 0.5), "p95_ms": pct(latencies, 0.95), "p99_ms": pct(latencies, 0.99),
+                "mean_ms": round(statistics.mean(latencies), 2), "bytes": entry["bytes"], "cached": self.cached.get(label, 0)}
+        return report
+
+# --------------------------------------------- simulated user ---------------------------------------------
+
+def decode(payload, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(payload)
+    if encoding == "br":
+        import brotli  # only needed when brotli is accepted
+        return brotli.decompress(payload)
+    return payload
+
+IMAGE_TYPES = ("png", "avif", "webp", "jpg", "svg")  # the twitter frame's src is not refetched when only its fragment changes
+
+def pick(srcset, width):
+    # the smallest candidate at least `width` pixels wide, else the widest
+    candidates = sorted((int(size[:-1]), url) for url, size in (candidate.strip().rsplit(" ", 1) for candidate in srcset.split(",")))
+    return next((url for size, url in candidates if size >= width), candidates[-1][1])
+
+def image_urls(value, width):
+    # the assets a browser loads for one callback output value
+    if isinstance(value, str):
+        path = value.partition("?")[0]
+        return [value] if path.startswith("assets/") and path.rsplit(".", 1)[-1] in IMAGE_TYPES else []
+    if isinstance(value, list):
+        # <picture> children: the first <source> with a srcset wins
+        for child in value:
+            srcset = child.get("props", {}).get("srcSet") if isinstance(child, dict) else None
+            if srcset:
+                return [pick(srcset, width)]
+        return [url for child in value for url in image_urls(child, width)]
+    if isinstance(value, dict) and "props" in value:
+        props = value["props"]
+        return [pick(props["srcSet"], width)] if props.get("srcSet") else image_urls(props.get("src"), width)
+    return []
+
+class User:
+
+    def __init__(self, url, results, headers, rng, options):
+        self.url = url
+        self.results = results
+        self.headers = headers
+        self.rng = rng
+        self.options = options
+        self.cache = {} if options.browser_cache else None
+
+    def request(self, label, path, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        headers = dict(self.headers, **({"Content-Type": "application/json"} if body is not None else {}))
+        cached = self.cache.get(path) if self.cache is not None and body is None else None
+        if cached and cached["immutable"]:
+            self.results.hit(label)
+            return cached["payload"]
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        request = urllib.request.Request(self.url + path, data=data, headers=headers)
+        start = time.perf_counter()
+        response_headers = {}
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                payload = response.read()
+                ok = response.status in (200, 204)
+                response_headers = response.headers
+        except (urllib.error.URLError, ConnectionError, socket.timeout) as error:
+            payload, ok = getattr(error, "read", lambda: b"")(), getattr(error, "code", None) == 304
+            response_headers = getattr(error, "headers", None) or {}
+        self.results.add(label, time.perf_counter() - start, len(payload), ok)
+        payload = decode(payload, response_headers.get("Content-Encoding"))
+        if ok and cached and not payload:
+            payload = cached["payload"]
+        elif ok and self.cache is not None and body is None:
+            control = response_headers.get("Cache-Control", "")
+            self.cache[path] = {"payload": payload, "etag": response_headers.get("ETag"), "immutable": "immutable" in control}
+        return payload if ok else None
+
+    def callback(self, dependency, state):
+        # a gated callback gets the values its gate passed on
+        inputs = [dict(item, value=[state.get(name) for name in dependency["gated"]] if dependency["gated"] else state.get(item["id"]))
+            for item in dependency["inputs"]]
+        outputs = [dict(zip(("id", "property"), output.rsplit(".", 1))) for output in dependency["outputs"]]
+        body = {"output": dependency["output"], "outputs": outputs if dependency["multi"] else outputs[0],
+            "inputs": inputs, "changedPropIds": [f"{item['id']}.{item['property']}" for item in dependency["changed"]],
+            "state": [dict(item, value=state.get(item["id"])) for item in dependency.get("state", [])]}
+        payload = self.request(dependency["label"], "/_dash-update-component", body)
+        return json.loads(payload) if payload else None
+
+    def fetch(self, label, value):
+        path, _, query = value.partition("?")
+        return self.request(label, "/" + urllib.parse.quote(path, safe="/%") + ("?" + query if query else ""))
+
+    def fetch_images(self, response):
+        # the driver change points the card at a new profile picture and flag; True once the picture is in
+        fetched = False
+        for output in (response or {}).get("response", {}).values():
+            for value in output.values():
+                for image in image_urls(value, self.options.image_width):
+                    kind = image.partition("?")[0].split("/")[-2]
+                    fetched = self.fetch("asset " + kind, image) is not None and kind == "profiles" or fetched
+        return fetched
+
+    def preload(self, app, driver):
+        position = app["drivers"].index(driver)
+        for name in app["drivers"][max(position - 1, 0):position + 2]:
+            if name != driver and name in app["pictures"]:
+                self.fetch("preload profiles", pick(app["pictures"][name]["avif"], self.options.image_width))
+
+    def next_driver(self, app, driver):
+        if self.rng.random() < self.options.neighbours:
+            position = app["drivers"].index(driver) + self.rng.choice((-1, 1))
+            return app["drivers"][position % len(app["drivers"])]
+        return self.rng.choice(app["drivers"])
+
+    def session(self, app, interactions, think):
+        state = {"chosen_driver": app["default_driver"], "chosen_year": app["default_year"]}
+        start = time.perf_counter()
+        self.request("page /", "/")
+        self.request("page /_dash-layout", "/_dash-layout")
+        self.request("page /_dash-dependencies", "/_dash-dependencies")
+        for asset in app["assets"]:
+            self.request("asset static", asset)
+        for dependency in app["callbacks"]:
+            if not dependency["gated"]:
+                self.fetch_images(self.callback(dict(dependency, changed=[]), state))
+        self.results.add("page to first paint", time.perf_counter() - start, 0, True)
+        seen = [dependency for dependency in app["callbacks"] if not dependency["gated"] or self.rng.random() < self.options.scroll]
+        for dependency in seen:
+            if dependency["gated"]:
+                self.callback(dict(dependency, changed=dependency["inputs"]), state)
+        if self.options.preload:
+            self.preload(app, state["chosen_driver"])
+        for _ in range(interactions):
+            time.sleep(think * self.rng.random())
+            changed = "chosen_driver" if self.rng.random() < 0.6 else "chosen_year"
+            if changed == "chosen_driver":
+                state[changed] = self.next_driver(app, state[changed])
+            else:
+                state[changed] = self.rng.choice(app["years"])
+            for dependency in seen:
+                listens = dependency["gated"] or [item["id"] for item in dependency["inputs"]]
+                trigger = dependency["inputs"] if dependency["gated"] else [item for item in dependency["inputs"] if item["id"] == changed]
+                if changed in listens:
+                    start = time.perf_counter()
+                    if self.fetch_images(self.callback(dict(dependency, changed=trigger), state)):
+                        self.results.add("driver change to image", time.perf_counter() - start, 0, True)
+            if changed == "chosen_driver" and self.options.preload:
+                self.preload(app, state["chosen_driver"])
+
+# --------------------------------------------- discovery ---------------------------------------------
+
+def find_component(node, component_id):
+    if isinstance(node, dict):
+        if node.get("props", {}).get("id") == component_id:
+            return node
+        children = list(node.values())
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = find_component(child, component_id)
+        if found:
+            return found
+    return None
+
+def discover(url):
+    layout = json.loads(urllib.request.urlopen(url + "/_dash-layout").read())
+    dependencies = json.loads(urllib.request.urlopen(url + "/_dash-dependencies").read())
+    index = urllib.request.urlopen(url + "/").read().decode()
+    driver = find_component(layout, "chosen_driver")["props"]
+    pictures = (find_component(layout, "profile_srcsets") or {}).get("props", {}).get("data") or {}
+    year = find_component(layout, "chosen_year")["props"]
+    # F1_LAZY_GRAPHS gates: the store a graph callback listens to -> the dropdowns it passes on
+    gates = {dependency["output"].rsplit(".", 1)[0]: [item["id"] for item in dependency["inputs"] if not item["id"].endswith("_seen")]
+        for dependency in dependencies if (dependency.get("clientside_function") or {}).get("namespace") == "lazy"}
+    callbacks = []
+    for dependency in dependencies:
+        # pattern-matching (theme switcher) and clientside callbacks never reach this app's server
+        if dependency["output"].startswith("{") or dependency.get("clientside_function"):
+            continue
+        outputs = dependency["output"].strip(".").split("...")
+        label = "callback " + "+".join(output.rsplit(".", 1)[0] for output in outputs)
+        callbacks.append({"output": dependency["output"], "outputs": outputs, "multi": dependency["output"].startswith(".."),
+            "inputs": dependency["inputs"], "state": dependency["state"], "label": label,
+            "gated": gates.get(dependency["inputs"][0]["id"]) if len(dependency["inputs"]) == 1 else None})
+    assets = sorted({part.split('"')[0] for part in index.split('href="')[1:] + index.split('src="')[1:] if part.startswith("/assets/")})
+    return {"drivers": [o if isinstance(o, str) else o["value"] for o in driver["options"]], "years": [o if not isinstance(o, dict) else o["value"] for o in year["options"]],
+        "default_driver": driver["value"], "default_year": year["value"], "callbacks": callbacks, "assets": assets, "pictures": pictures}
+
+# --------------------------------------------- run ---------------------------------------------
+
+def run(url, users, duration, interactions, think, headers, seed, options):
+    app = discover(url)
+    results = Results()
+    deadline = time.perf_counter() + duration
+
+    def simulate(number):
+        user = User(url, results, headers, random.Random(seed + number), options)
+        while time.perf_counter() < deadline:
+            user.session(app, interactions, think)
+
+    threads = [threading.Thread(target=simulate, args=(number,), daemon=True) for number in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.summary(time.perf_counter() - start), time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent simulated users.")
+    parser.add_argument("--url", help="server to test; omit with --start")
+    parser.add_argument("--start", action="store_true", help="start `gunicorn app:server` locally for the run")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers with --start")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker with --start")
+    parser.add_argument("--worker-class", help="gunicorn worker class with --start")
+    parser.add_argument("--gunicorn-arg", action="append", default=[], help="extra gunicorn argument with --start (repeatable)")
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to keep starting sessions")
+    parser.add_argument("--interactions", type=int, default=10, help="dropdown changes per session")
+    parser.add_argument("--think", type=float, default=0.0, help="max seconds a user waits between changes")
+    parser.add_argument("--header", action="append", default=[], help="extra request header 'Name: value' (repeatable)")
+    parser.add_argument("--accept-encoding", help="send this Accept-Encoding, e.g. 'br, gzip'; bytes are counted compressed")
+    parser.add_argument("--browser-cache", action="store_true", help="every user caches responses between its sessions like a browser")
+    parser.add_argument("--image-width", type=int, default=480, help="pixels the profile picture is drawn at (picks the srcset candidate)")
+    parser.add_argument("--preload", action="store_true", help="fetch the pictures the page preloads after every driver change")
+    parser.add_argument("--neighbours", type=float, default=0.0, help="share of driver changes that step to the next or previous driver")
+    parser.add_argument("--scroll", type=float, default=1.0, help="with F1_LAZY_GRAPHS, chance a user sees each gated graph in a session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if not args.url and not args.start:
+        parser.error("give --url or --start")
+    headers = dict(header.split(": ", 1) for header in args.header)
+    if args.accept_encoding:
+        headers["Accept-Encoding"] = args.accept_encoding
+    process = None
+    url = args.url
+    if args.start:
+        process, url = start_server(args.workers, args.threads, args.worker_class, args.gunicorn_arg)
+    try:
+        report, elapsed = run(url, args.users, args.duration, args.interactions, args.think, headers, args.seed, args)
+    finally:
+        if process:
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+
+    total = sum(entry["requests"] for entry in report.values())
+    errors = sum(entry["errors"] for entry in report.values())
+    received = sum(entry["bytes"] for entry in report.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), {errors} errors, {args.users} users against {url}")
+    print(f"{received / 1048576:.1f} MB received, {received / max(total, 1) / 1024:.1f} KB per request")
+    print(f"{'label':<60} {'reqs':>6} {'err%':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'KB':>9} {'cached':>7}")
+    for label, entry in report.items():
+        print(f"{label[:60]:<60} {entry['requests']:>6} {entry['error_rate'] * 100:>6.2f} {entry['rps']:>7} {entry['p50_ms']:>8} {entry['p95_ms']:>8} {entry['p99_ms']:>8} {entry['bytes'] / 1024:>9.1f} {entry['cached']:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"url": url, "users": args.users, "duration_s": round(elapsed, 2), "workers": args.workers,
+                "threads": args.threads, "worker_class": args.worker_class, "headers": headers, "browser_cache": args.browser_cache,
+                "image_width": args.image_width, "preload": args.preload, "neighbours": args.neighbours, "scroll": args.scroll,
+                "bytes": received, "results": report}, f, indent=2)
@@ -0,0 +1,208 @@
+# --------------------------------------------- synthetic dataset generator ---------------------------------------------
+#
+# Writes races.csv and drivers.csv with exactly the columns of data/races.csv and
+# data/drivers.csv (plus the typed feather copies), for any span of seasons and any size.
+# Cardinalities follow the real championship: roughly 770 drivers, 210 teams, 140 finishing
+# statuses and 75 Grands Prix between 1950 and today, 7 races a season growing to 24, and
+# 16-34 cars per race.
+#
+#   python benchmarks/synthetic.py --out /tmp/f1-synthetic                  # 1950-2024, ~25k rows
+#   python benchmarks/synthetic.py --out /tmp/f1-x10 --scale 10              # ten times the races
+#   F1_DATA_DIR=/tmp/f1-synthetic python app.py
+#   python benchmarks/bench_callbacks.py --data-dir /tmp/f1-synthetic --limit 20
+#   python benchmarks/bench_ingest.py --races /tmp/f1-synthetic/races.csv
+
+import argparse
+import datetime
+import os
+import string
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import dataset
+
+RACE_COLUMNS = ['Year', 'GP', 'DriverNumber', 'BroadcastName', 'Abbreviation', 'TeamName', 'TeamColor', 'FirstName',
+    'LastName', 'FullName', 'Position', 'GridPosition', 'Q1', 'Q2', 'Q3', 'Time', 'Status', 'Points', 'RoundNumber',
+    'Country', 'Location', 'EventDate', 'EventName', 'EventFormat', 'Session1', 'Session1Date', 'Session2',
+    'Session2Date', 'Session3', 'Session3Date', 'Session4', 'Session4Date', 'Session5', 'Session5Date', 'F1ApiSupport',
+    'OfficialEventName', 'ResultType', 'QualiStatus', 'Counter']
+DRIVER_COLUMNS = ['FullName', 'FirstName', 'LastName', 'DriverNumber', 'DOB', 'Nationality', 'FlagURL', 'twitter',
+    'Place of Birth']
+
+COUNTRIES = [('Australia', 'au', 'Melbourne'), ('Belgium', 'be', 'Spa-Francorchamps'), ('Brazil', 'br', 'São Paulo'),
+    ('Canada', 'ca', 'Montréal'), ('China', 'cn', 'Shanghai'), ('Germany', 'de', 'Hockenheim'), ('Denmark', 'dk', 'Roskilde'),
+    ('Spain', 'es', 'Barcelona'), ('Finland', 'fi', 'Keimola'), ('France', 'fr', 'Le Castellet'), ('Great Britain', 'gb', 'Silverstone'),
+    ('Italy', 'it', 'Monza'), ('Japan', 'jp', 'Suzuka'), ('Monaco', 'mc', 'Monte Carlo'), ('Mexico', 'mx', 'Mexico City'),
+    ('Netherlands', 'nl', 'Zandvoort'), ('New Zealand', 'nz', 'Auckland'), ('Poland', 'pl', 'Poznań'), ('Russia', 'ru', 'Sochi'),
+    ('Sweden', 'se', 'Anderstorp'), ('Thailand', 'th', 'Buriram')]
+GP_PREFIXES = ['', 'Pacific ', 'European ', 'Grand Prix of ', 'Eastern ', 'Western ', 'Northern ', 'Southern ']
+FAILURES = ['Accident', 'Collision', 'Collision damage', 'Engine', 'Gearbox', 'Brakes', 'Suspension', 'Hydraulics',
+    'Power Unit', 'Power loss', 'Electrical', 'Electronics', 'Oil leak', 'Water leak', 'Fuel pressure', 'Fuel system',
+    'Transmission', 'Clutch', 'Driveshaft', 'Differential', 'Overheating', 'Puncture', 'Wheel', 'Wheel nut', 'Tyre',
+    'Exhaust', 'Turbo', 'Radiator', 'Steering', 'Spun off', 'Disqualified', 'Retired', 'Withdrew', 'Did not start',
+    'Fire', 'Throttle', 'Vibrations', 'Battery', 'Rear wing', 'Front wing', 'Debris', 'Mechanical', 'Ignition', 'Injection']
+FAILURE_SUFFIXES = ['', ' failure', ' damage', ' problem']
+FIRST = ['Alex', 'Carlos', 'Charles', 'Daniel', 'Esteban', 'Felipe', 'George', 'Graham', 'Jack', 'Jacques', 'James',
+    'Jochen', 'Juan', 'Kevin', 'Kimi', 'Lando', 'Lewis', 'Luigi', 'Marcus', 'Mario', 'Max', 'Michael', 'Mika', 'Nelson',
+    'Nico', 'Niki', 'Oscar', 'Pierre', 'Ralf', 'Riccardo', 'Rubens', 'Sebastian', 'Sergio', 'Stirling', 'Valtteri', 'Yuki']
+LAST = ['Alesi', 'Berger', 'Brabham', 'Clark', 'Coulthard', 'Fangio', 'Fittipaldi', 'Hakkinen', 'Hill', 'Hunt', 'Ickx',
+    'Irvine', 'Jones', 'Lauda', 'Mansell', 'Moss', 'Patrese', 'Peterson', 'Piquet', 'Prost', 'Regazzoni', 'Reutemann',
+    'Rindt', 'Rosberg', 'Scheckter', 'Senna', 'Stewart', 'Surtees', 'Villeneuve', 'Watson', 'Webber', 'Button', 'Massa',
+    'Barrichello', 'Trulli', 'Fisichella', 'Heidfeld', 'Kubica', 'Kovalainen', 'Sutil', 'Glock', 'Perez', 'Ocon', 'Gasly']
+TEAM_WORDS = ['Scuderia', 'Racing', 'Motorsport', 'Engineering', 'Grand Prix', 'Works', 'Team', 'Automobiles', 'F1']
+TEAM_NAMES = ['Ferrari', 'Maserati', 'Alfa', 'Lotus', 'Cooper', 'BRM', 'Brabham', 'March', 'Tyrrell', 'McLaren', 'Williams',
+    'Ligier', 'Renault', 'Arrows', 'Minardi', 'Jordan', 'Sauber', 'Stewart', 'Jaguar', 'Toyota', 'Honda', 'Red Bull',
+    'Toro Rosso', 'Force India', 'Haas', 'Alpine', 'Aston Martin', 'Mercedes', 'Vanwall', 'Matra', 'Surtees', 'Shadow']
+# points for positions 1.. in each era
+POINTS = [(1950, [8, 6, 4, 3, 2]), (1960, [8, 6, 4, 3, 2, 1]), (1961, [9, 6, 4, 3, 2, 1]), (1991, [10, 6, 4, 3, 2, 1]),
+    (2003, [10, 8, 6, 5, 4, 3, 2, 1]), (2010, [25, 18, 15, 12, 10, 8, 6, 4, 2, 1])]
+
+def season_points(year):
+    return [points for start, points in POINTS if start <= year][-1]
+
+class Generator:
+
+    def __init__(self, start, end, scale, seed):
+        self.rng = np.random.default_rng(seed)
+        self.start, self.end, self.scale = start, end, scale
+        self.grand_prix = [(f"{prefix}{country} Grand Prix", country, flag, location) for prefix in GP_PREFIXES
+            for country, flag, location in COUNTRIES][:75]
+        self.statuses = [f"{failure}{suffix}" for suffix in FAILURE_SUFFIXES for failure in FAILURES][:130]
+        self.statuses += ['+1 Lap'] + [f"+{laps} Laps" for laps in range(2, 10)]
+        self.teams = []
+        self.drivers = []
+        self.team_serial = 0
+        self.driver_serial = 0
+
+    # ---- people and teams ----
+
+    def new_team(self):
+        self.team_serial += 1
+        serial, names, words = self.team_serial - 1, len(TEAM_NAMES), len(TEAM_WORDS)
+        name = TEAM_NAMES[serial % names]
+        if serial >= names:
+            name += " " + TEAM_WORDS[(serial // names - 1) % words]
+        if serial >= names * (words + 1):
+            name += f" {serial // (names * (words + 1)) + 1}"
+        return {"TeamName": name, "TeamColor": "%06X" % self.rng.integers(0, 0xFFFFFF)}
+
+    def new_driver(self, year):
+        self.driver_serial += 1
+        # the serial keeps every FullName unique, so no two careers get merged
+        first = FIRST[self.rng.integers(len(FIRST))]
+        last = LAST[(self.driver_serial - 1) % len(LAST)]
+        if self.driver_serial > len(LAST):
+            last += f"-{string.ascii_uppercase[self.driver_serial % 26]}{self.driver_serial}"
+        country, flag, location = COUNTRIES[self.rng.integers(len(COUNTRIES))]
+        born = datetime.date(year - int(self.rng.integers(19, 34)), int(self.rng.integers(1, 13)), int(self.rng.integers(1, 29)))
+        return {"FirstName": first, "LastName": last, "FullName": f"{first} {last}", "DriverNumber": int(self.rng.integers(1, 100)),
+            "BroadcastName": f"{first[0]} {last.upper()}", "Abbreviation": last[:3].upper(),
+            "DOB": f"{born.day}/{born.month}/{born.year}", "Nationality": country, "FlagURL": flag,
+            "twitter": f"https://twitter.com/{first}{last}".replace(" ", ""), "Place of Birth": f"{location}, {country}"}
+
+    def refresh_grid(self, year):
+        # ~2.8 new teams and ~10 new drivers a season give the historical totals over 75 years
+        teams = int(np.clip(round(10 + 6 * np.sin((year - 1950) / 12)), 8, 17))
+        self.teams = [team for team in self.teams if self.rng.random() > 2.8 / max(teams, 1)]
+        while len(self.teams) < teams:
+            self.teams.append(self.new_team())
+        seats = 2 * teams
+        self.drivers = [driver for driver in self.drivers if self.rng.random() > 10.3 / seats][:seats]
+        while len(self.drivers) < seats:
+            self.drivers.append(self.new_driver(year))
+        self.rng.shuffle(self.drivers)
+        return [(driver, self.teams[i // 2]) for i, driver in enumerate(self.drivers)]
+
+    # ---- races ----
+
+    def events(self, year):
+        races = int(round((7 + (24 - 7) * (year - 1950) / (2024 - 1950)) * self.scale))
+        picks = self.rng.choice(len(self.grand_prix), size=min(races, len(self.grand_prix)), replace=False)
+        picks = [self.grand_prix[i] for i in picks] + [self.grand_prix[i] for i in self.rng.integers(len(self.grand_prix), size=max(0, races - len(picks)))]
+        # with --scale a Grand Prix can come up twice in a season; number the repeats
+        seen = {}
+        for i, (gp, *rest) in enumerate(picks):
+            seen[gp] = seen.get(gp, 0) + 1
+            if seen[gp] > 1:
+                picks[i] = (f"{gp} {seen[gp]}", *rest)
+        first = pd.Timestamp(year=year, month=3, day=1)
+        gap = max(1, 250 // max(races, 1))
+        sprints = set(self.rng.choice(races, size=min(3, races), replace=False)) if year >= 2021 else set()
+        for round_number, (gp, country, flag, location) in enumerate(picks, start=1):
+            date = (first + pd.Timedelta(days=gap * round_number)).normalize()
+            sprint = round_number - 1 in sprints
+            sessions = ['Practice 1', 'Qualifying', 'Practice 2', 'Sprint', 'Race'] if sprint else ['Practice 1', 'Practice 2', 'Practice 3', 'Qualifying', 'Race']
+            offsets = [2, 2, 1, 1, 0]
+            event = {"Year": year, "GP": gp, "RoundNumber": round_number, "Country": country, "Location": location,
+                "EventDate": date.date().isoformat(), "EventName": gp, "EventFormat": "sprint" if sprint else "conventional",
+                "F1ApiSupport": year >= 2018, "OfficialEventName": f"FORMULA 1 {year} {gp.upper()}"}
+            for i, (session, offset) in enumerate(zip(sessions, offsets), start=1):
+                event[f"Session{i}"] = session
+                event[f"Session{i}Date"] = str(date - pd.Timedelta(days=offset))
+            yield event
+
+    def results(self, year, event, grid):
+        cars = len(grid)
+        points = season_points(year)
+        grid_positions = self.rng.permutation(cars) + 1
+        pace = grid_positions + self.rng.normal(0, cars / 4, size=cars)
+        positions = np.argsort(np.argsort(pace)) + 1
+        finished = self.rng.random(cars) > 0.25
+        rows = []
+        for (driver, team), grid_position, position, ok in zip(grid, grid_positions, positions, finished):
+            if ok:
+                laps_down = max(0, int(position) - 8) // 4
+                status = 'Finished' if laps_down == 0 else self.statuses[-9 + min(laps_down, 9) - 1]
+            else:
+                status = self.statuses[self.rng.integers(130)]
+            row = {key: driver[key] for key in ['DriverNumber', 'BroadcastName', 'Abbreviation', 'FirstName', 'LastName', 'FullName']}
+            row.update(team)
+            row.update({"Position": float(position), "GridPosition": float(grid_position), "Q1": np.nan, "Q2": np.nan, "Q3": np.nan,
+                "Time": str(pd.Timedelta(seconds=5400 + 3 * int(position) + float(self.rng.random()))) if status == 'Finished' else np.nan,
+                "Status": status, "Points": float(points[position - 1]) if position <= len(points) else 0.0})
+            row.update(event)
+            rows.append(row)
+        return rows
+
+    def build(self):
+        rows, people = [], {}
+        for year in range(self.start, self.end + 1):
+            grid = self.refresh_grid(year)
+            for driver, _ in grid:
+                people.setdefault(driver["FullName"], driver)
+            for event in self.events(year):
+                rows.extend(self.results(year, event, grid))
+        races = pd.DataFrame(rows)
+        # same buckets as data.py
+        races['ResultType'] = np.where(races['Position'] <= 3, 'Podium', 'Points')
+        races['ResultType'] = np.where(races['Points'] != 0, races['ResultType'], 'NoPoints')
+        races['QualiStatus'] = "Q3"
+        races['QualiStatus'] = np.where(races['GridPosition'] >= 15, 'Q2', races['QualiStatus'])
+        races['QualiStatus'] = np.where(races['GridPosition'] >= 10, 'Q1', races['QualiStatus'])
+        races['QualiStatus'] = np.where(races['GridPosition'] == 1, 'Pole', races['QualiStatus'])
+        races['Counter'] = 1
+        races = races.sort_values(by=['EventDate'], kind='mergesort')[RACE_COLUMNS]
+        drivers = pd.DataFrame(list(people.values()))[DRIVER_COLUMNS]
+        return races, drivers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic races/drivers dataset with the real schema.")
+    parser.add_argument("--out", required=True, help="directory to write races.csv, drivers.csv and the feather files to")
+    parser.add_argument("--start", type=int, default=1950)
+    parser.add_argument("--end", type=int, default=2024)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on the races per season")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    races, drivers = Generator(args.start, args.end, args.scale, args.seed).build()
+    os.makedirs(args.out, exist_ok=True)
+    races.to_csv(os.path.join(args.out, "races.csv"), index=False)
+    drivers.to_csv(os.path.join(args.out, "drivers.csv"), index=False)
+    dataset.write_columnar(pd.read_csv(os.path.join(args.out, "races.csv")), pd.read_csv(os.path.join(args.out, "drivers.csv")), args.out)
+    print(f"{len(races)} race rows, {races['FullName'].nunique()} drivers, {races['TeamName'].nunique()} teams, "
+        f"{races['Status'].nunique()} statuses, {races['GP'].nunique()} Grands Prix, "
+        f"{races.groupby(['Year', 'GP']).ngroups} races written to {args.out}")
@@ -1,67 +1,209 @@
 
 # import packages and create cache folder for F1 data
 
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import fastf1
-fastf1.Cache.enable_cache('cache')  
 import pandas as pd
 import numpy as np
+import dataset
 
 seasons_wanted = [2022, 2021, 2020, 2019, 2018] # specify desired timeframe
+workers = 8 # number of race sessions loaded at the same time, 1 loads them one by one
+
+# --------------------------------------------- session loading ---------------------------------------------
+
+def init_worker(offline=False):
+    # runs in the main process and once in every worker process so all of them share the same cache setup
+    fastf1.Cache.enable_cache('cache')
+    if offline:
+        fastf1.Cache.offline_mode(True)
+
+def load_schedules(seasons):
+    # one schedule request per season, shared by the session list and the event details
+    return {year: fastf1.get_event_schedule(year) for year in seasons}
+
+def race_sessions(schedules):
+    # every (year, gp) pair to load, in schedule order
+    sessions = []
+    for year, schedule in schedules.items():
+        gp_list = [i for i in schedule['EventName'] if 'Grand' in i]
+        sessions.extend((year, gp) for gp in gp_list)
+    return sessions
+
+def completed_sessions(schedules):
+    # (year, gp) pairs whose race weekend has already happened
+    today = pd.Timestamp.now().normalize()
+    done = set()
+    for year, schedule in schedules.items():
+        dates = pd.to_datetime(schedule['EventDate'])
+        done.update((year, gp) for gp, date in zip(schedule['EventName'], dates) if date <= today)
+    return done
+
+def load_race_results(year, gp):
+    # only the classification is used, so skip laps, telemetry, weather and race control messages
+    session = fastf1.get_session(year, gp, 'Race')
+    session.load(laps=False, telemetry=False, weather=False, messages=False)
+    return pd.DataFrame(session.results)
+
+def load_sessions(sessions, workers=workers, processes=False, offline=False):
+    # load race results concurrently; results come back in the order of `sessions`
+    # no matter which load finishes first, so the merged frame is always the same
+    if workers <= 1:
+        return [load_race_results(year, gp) for year, gp in sessions]
+    years = [year for year, _ in sessions]
+    gps = [gp for _, gp in sessions]
+    # threads share the cached (and, offline, network-free) session build_races already set up;
+    # calling enable_cache again from a thread would swap it out from under the others
+    if processes:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(offline,))
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        return list(executor.map(load_race_results, years, gps))
+
+# --------------------------------------------- frame builder ---------------------------------------------
+
+RESULT_COLUMNS = ['Year', 'GP', 'DriverNumber', 'BroadcastName','Abbreviation', 'TeamName',
+    'TeamColor', 'FirstName', 'LastName','FullName', 'Position', 'GridPosition',
+    'Q1','Q2','Q3','Time', 'Status', 'Points']
+
+EVENT_COLUMNS = ['Year', 'RoundNumber', 'Country', 'Location', 'EventDate', 'EventName', 'EventFormat',
+    'Session1', 'Session1Date', 'Session2', 'Session2Date', 'Session3', 'Session3Date',
+    'Session4','Session4Date', 'Session5', 'Session5Date', 'F1ApiSupport']
+
+class FrameBuilder:
+    # collects frames and concatenates them once in build(), instead of copying the
+    # whole accumulated frame on every append; leading columns keep the given order
+    # and any extra columns follow in order of first appearance
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.frames = []
+        self.values = []
+
+    def add(self, frame, **values):
+        # per-frame constants (Year, GP) are expanded in build() rather than copied in here
+        self.frames.append(frame)
+        self.values.append(values)
+
+    def build(self):
+        if not self.frames:
+            return pd.DataFrame(columns=self.columns)
+        combined = pd.concat(self.frames, ignore_index=True)
+        lengths = [len(frame) for frame in self.frames]
+        for key in dict.fromkeys(k for values in self.values for k in values):
+            combined[key] = np.repeat([values.get(key) for values in self.values], lengths)
+        extra = [c for c in combined.columns if c not in self.columns]
+        return combined.reindex(columns=self.columns + extra)
+
+# --------------------------------------------- build dataset ---------------------------------------------
+
+def build_races(seasons=seasons_wanted, workers=workers, processes=False, offline=False, sessions=None):
+
+    init_worker(offline)
+    schedules = load_schedules(seasons)
+
+    # create race result dataframe
+    if sessions is None:
+        sessions = race_sessions(schedules)
+    results = load_sessions(sessions, workers=workers, processes=processes, offline=offline)
+    historical_races = FrameBuilder(RESULT_COLUMNS)
+    for (year, gp), temp_df in zip(sessions, results):
+        historical_races.add(temp_df, Year=str(year), GP=str(gp))
+    historical_races = historical_races.build()
+
+    # create event detail dataframe
+
+    all_events = FrameBuilder(EVENT_COLUMNS)
+    for year, schedule in schedules.items():
+        all_events.add(schedule, Year=str(year))
+    all_events = all_events.build()
+
+    # merge the two dataframes
+
+    race_df = pd.merge(
+        historical_races,
+        all_events,
+        how='left',
+        left_on=['Year','GP'],
+        right_on = ['Year','EventName'])
+
+    # create data buckets
+
+    race_df['ResultType'] = np.where(race_df['Position']<= 3, 'Podium', 'Points')
+    race_df['ResultType'] = np.where(race_df['Points']!=0, race_df['ResultType'], 'NoPoints')
+    race_df['QualiStatus'] = "Q3"
+    race_df['QualiStatus'] = np.where(race_df['GridPosition'] >= 15, 'Q2', race_df['QualiStatus'])
+    race_df['QualiStatus'] = np.where(race_df['GridPosition'] >= 10, 'Q1', race_df['QualiStatus'])
+    race_df['QualiStatus'] = np.where(race_df['GridPosition'] == 1, 'Pole', race_df['QualiStatus'])
+    race_df['Counter'] = 1
+
+    race_df["EventDate"] = pd.to_datetime(race_df["EventDate"])
+    race_df["EventDate"] = race_df["EventDate"].dt.date
+    race_df = race_df.sort_values(by=['EventDate'])
+    return race_df
+
+# --------------------------------------------- incremental update ---------------------------------------------
+
+def read_existing(path):
+    # rows already on disk, or None when there is nothing to update yet
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path)
+
+def outdated_sessions(existing, sessions, refresh_years=()):
+    # sessions missing from the existing file, plus stale ones: a season listed in
+    # refresh_years or a race whose classification still has blank positions or points
+    have = existing.groupby(['Year', 'GP'])[['Position', 'Points']].apply(lambda rows: rows.notna().all().all())
+    complete = {(int(year), gp) for (year, gp), ok in have.items() if ok}
+    refresh_years = {int(year) for year in refresh_years}
+    return [(year, gp) for year, gp in sessions if (year, gp) not in complete or year in refresh_years]
+
+def merge_races(existing, race_df, sessions):
+    # replace the reloaded sessions in the existing rows and append the new ones;
+    # the new rows go through the same csv round trip so both halves share dtypes
+    race_df = pd.read_csv(io.StringIO(race_df.to_csv(index=False)))
+    reloaded = pd.MultiIndex.from_tuples(sessions, names=['Year', 'GP'])
+    keep = ~existing.set_index(['Year', 'GP']).index.isin(reloaded)
+    merged = pd.concat([existing[keep], race_df], ignore_index=True)
+    return merged.sort_values(by=['EventDate'], kind='mergesort')
+
+def update_races(path, seasons=seasons_wanted, workers=workers, processes=False, offline=False, refresh_years=()):
+    # incremental refresh: only load the sessions `path` is missing or has stale rows for
+    existing = read_existing(path)
+    if existing is None:
+        return build_races(seasons, workers=workers, processes=processes, offline=offline)
+    init_worker(offline)
+    schedules = load_schedules(seasons)
+    done = completed_sessions(schedules)
+    sessions = [session for session in race_sessions(schedules) if session in done]
+    sessions = outdated_sessions(existing, sessions, refresh_years)
+    if not sessions:
+        return existing
+    race_df = build_races(seasons, workers=workers, processes=processes, offline=offline, sessions=sessions)
+    return merge_races(existing, race_df, sessions)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild data/races.csv from the fastf1 API or cache.")
+    parser.add_argument("--workers", type=int, default=workers, help="race sessions loaded concurrently (1 = serial)")
+    parser.add_argument("--processes", action="store_true", help="load sessions in a process pool instead of threads")
+    parser.add_argument("--offline", action="store_true", help="only read the local fastf1 cache, never the network")
+    parser.add_argument("--incremental", action="store_true", help="only load races missing from (or stale in) data/races.csv")
+    parser.add_argument("--refresh", type=int, nargs="*", default=[], metavar="YEAR", help="with --incremental, reload these seasons too")
+    args = parser.parse_args()
+
+    if args.incremental:
+        race_df = update_races('data/races.csv', workers=args.workers, processes=args.processes, offline=args.offline, refresh_years=args.refresh)
+    else:
+        race_df = build_races(workers=args.workers, processes=args.processes, offline=args.offline)
+    race_df.to_csv('data/races.csv', index=False)
 
-# create race result dataframe
-historical_races = pd.DataFrame(columns= 
-    ['Year', 'GP', 'DriverNumber', 'BroadcastName','Abbreviation', 'TeamName', 
-    'TeamColor', 'FirstName', 'LastName','FullName', 'Position', 'GridPosition', 
-    'Q1','Q2','Q3','Time', 'Status', 'Points'])
-for year in seasons_wanted:
-    schedule = fastf1.get_event_schedule(year)
-    gp_list = [i for i in schedule['EventName'] if 'Grand' in i]
-    for gp in gp_list:
-        session = fastf1.get_session(year, gp, 'Race')
-        session.load()
-        temp_df = session.results
-        temp_df.insert(0,'Year','')
-        temp_df.insert(1,'GP','')
-        temp_df = temp_df.assign(Year=str(year))
-        temp_df = temp_df.assign(GP=str(gp))
-        historical_races = historical_races.append(temp_df, ignore_index=True)
-
-# create event detail dataframe
-
-all_events = pd.DataFrame(columns= 
-    ['Year', 'RoundNumber', 'Country', 'Location', 'EventDate', 'EventName', 'EventFormat', 
-    'Session1', 'Session1Date', 'Session2', 'Session2Date', 'Session3', 'Session3Date', 
-    'Session4','Session4Date', 'Session5', 'Session5Date', 'F1ApiSupport'])
-for year in seasons_wanted:
-    schedule = fastf1.get_event_schedule(year=year)
-    schedule.insert(0,'Year','')
-    schedule = schedule.assign(Year=str(year))
-    all_events = pd.concat([all_events, schedule])
-
-# merge the two dataframes
-
-race_df = pd.merge(
-    historical_races, 
-    all_events,  
-    how='left', 
-    left_on=['Year','GP'], 
-    right_on = ['Year','EventName'])
-
-# create data buckets
-
-race_df['ResultType'] = np.where(race_df['Position']<= 3, 'Podium', 'Points')
-race_df['ResultType'] = np.where(race_df['Points']!=0, race_df['ResultType'], 'NoPoints')
-race_df['QualiStatus'] = "Q3"
-race_df['QualiStatus'] = np.where(race_df['GridPosition'] >= 15, 'Q2', race_df['QualiStatus'])
-race_df['QualiStatus'] = np.where(race_df['GridPosition'] >= 10, 'Q1', race_df['QualiStatus'])
-race_df['QualiStatus'] = np.where(race_df['GridPosition'] == 1, 'Pole', race_df['QualiStatus'])
-race_df['Counter'] = 1
-
-race_df["EventDate"] = pd.to_datetime(race_df["EventDate"])
-race_df["EventDate"] = race_df["EventDate"].dt.date 
-race_df = race_df.sort_values(by=['EventDate']) 
-
-race_df.to_csv('data/races.csv', index=False)
+    # typed feather copies for app.py, parsed back from the csv so both files hold the same rows
+    dataset.write_columnar(pd.read_csv('data/races.csv'), pd.read_csv('data/drivers.csv'), 'data')
 
 # race = 'Singapore Grand Prix'
 # year = 2018
@@ -0,0 +1,186 @@
+# --------------------------------------------- dataset schema and loading ---------------------------------------------
+#
+# data.py writes the race results as csv (kept for diffs and notebooks) plus typed feather
+# files, and `python dataset.py` (bin/post_compile) writes the feather files from the csv. app.py
+# loads a feather file when it is at least as new as its csv and otherwise parses the csv into
+# the same typed schema, so callbacks see identical dtypes either way and a csv updated by hand
+# is never shadowed by a stale feather file.
+
+import hashlib
+import os
+
+import pandas as pd
+
+from settings import DATA_DIR
+
+# repetitive strings become categoricals; categories are sorted and ordered so that
+# min/max and sorting give the same answer as on the plain strings
+RACE_CATEGORIES = ['GP', 'BroadcastName', 'Abbreviation', 'TeamName', 'TeamColor', 'FirstName', 'LastName',
+    'FullName', 'Status', 'Country', 'Location', 'EventName', 'EventFormat', 'Session1', 'Session2', 'Session3',
+    'Session4', 'Session5', 'OfficialEventName', 'ResultType', 'QualiStatus']
+RACE_INTS = {'Year': 'int16', 'DriverNumber': 'int16', 'RoundNumber': 'int8', 'Position': 'int8',
+    'GridPosition': 'int8', 'Counter': 'int8'}
+RACE_DATES = ['EventDate', 'Session1Date', 'Session2Date', 'Session3Date', 'Session4Date', 'Session5Date']
+
+DRIVER_CATEGORIES = ['Nationality', 'FlagURL']
+DRIVER_INTS = {'DriverNumber': 'int16'}
+
+def paths(data_dir=DATA_DIR):
+    return {
+        "races_csv": os.path.join(data_dir, "races.csv"),
+        "drivers_csv": os.path.join(data_dir, "drivers.csv"),
+        "races": os.path.join(data_dir, "races.feather"),
+        "drivers": os.path.join(data_dir, "drivers.feather"),
+    }
+
+def ordered_category(series):
+    return pd.Categorical(series, categories=sorted(series.dropna().unique()), ordered=True)
+
+def small_int(series, dtype):
+    # results with a missing position (not classified yet) keep a float column
+    return series.astype(dtype) if series.notna().all() else series.astype('float32')
+
+def typed_races(races):
+    races = races.copy()
+    for column in RACE_CATEGORIES:
+        races[column] = ordered_category(races[column].astype(object))
+    for column, dtype in RACE_INTS.items():
+        races[column] = small_int(races[column], dtype)
+    for column in RACE_DATES:
+        races[column] = pd.to_datetime(races[column])
+    races['Points'] = races['Points'].astype('float64')
+    races['Time'] = pd.to_timedelta(races['Time'])
+    races['F1ApiSupport'] = races['F1ApiSupport'].astype(bool)
+    return races.reset_index(drop=True)
+
+def typed_drivers(drivers):
+    drivers = drivers.copy()
+    for column in DRIVER_CATEGORIES:
+        drivers[column] = ordered_category(drivers[column].astype(object))
+    for column, dtype in DRIVER_INTS.items():
+        drivers[column] = small_int(drivers[column], dtype)
+    return drivers
+
+def write_columnar(races, drivers, data_dir=DATA_DIR):
+    files = paths(data_dir)
+    typed_races(races).to_feather(files["races"])
+    typed_drivers(drivers).to_feather(files["drivers"])
+
+def columnar(files, name):
+    # the feather file when it exists and is not older than the csv, else the csv
+    feather, csv = files[name], files[name + "_csv"]
+    if os.path.exists(feather) and (not os.path.exists(csv) or os.path.getmtime(feather) >= os.path.getmtime(csv)):
+        return feather
+    return csv
+
+def source_files(data_dir=DATA_DIR):
+    # the files load_races and load_drivers actually read
+    files = paths(data_dir)
+    return [columnar(files, "races"), columnar(files, "drivers")]
+
+def version(data_dir=DATA_DIR):
+    # content hash of the loaded files; anything cached from the data is keyed by it
+    digest = hashlib.sha1()
+    for path in source_files(data_dir):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def load_races(data_dir=DATA_DIR):
+    path = columnar(paths(data_dir), "races")
+    if path.endswith(".feather"):
+        return pd.read_feather(path)
+    return typed_races(pd.read_csv(path))
+
+def load_drivers(data_dir=DATA_DIR):
+    path = columnar(paths(data_dir), "drivers")
+    if path.endswith(".feather"):
+        return pd.read_feather(path)
+    return typed_drivers(pd.read_csv(path))
+
+# --------------------------------------------- row index ---------------------------------------------
+
+class RaceIndex:
+    # row positions per driver and per (driver, year), built once at startup so a callback
+    # only touches the rows of the chosen driver instead of scanning the whole table
+
+    def __init__(self, races):
+        self.races = races
+        self.empty = races.iloc[:0]
+        self.by_driver = races.groupby('FullName', sort=False, observed=True).indices
+        self.by_driver_year = races.groupby(['FullName', 'Year'], sort=False, observed=True).indices
+
+    def rows(self, positions):
+        return self.empty if positions is None else self.races.take(positions)
+
+    def driver(self, name):
+        return self.rows(self.by_driver.get(name))
+
+    def driver_year(self, name, year):
+        return self.rows(self.by_driver_year.get((name, year)))
+
+# --------------------------------------------- driver summary ---------------------------------------------
+
+class RaceSummary:
+    # career and season KPIs for every driver, computed in one pass over the races when the
+    # data is loaded; nothing is stored on disk, so it always matches the loaded races
+
+    def __init__(self, races):
+        by_driver = races.groupby('FullName', sort=False, observed=True)
+        latest = races.loc[races['Year'] == by_driver['Year'].transform('max')].drop_duplicates('FullName').set_index('FullName')
+        first = races.drop_duplicates('FullName').set_index('FullName')
+        wins = races['Counter'].where(races['Position'] == 1, 0).groupby(races['FullName'], sort=False, observed=True).sum()
+        summary = pd.DataFrame({
+            'CareerPoints': by_driver['Points'].sum(),
+            'Wins': wins,
+            'HighestPosition': by_driver['Position'].min(),
+            'TeamName': latest['TeamName'].astype(object),
+            'DriverNumber': first['DriverNumber'],
+        })
+        season_points = races.groupby(['FullName', 'Year'], sort=False, observed=True)['Points'].sum()
+        self.drivers = summary.to_dict('index')
+        self.season_points = season_points.to_dict()
+        self.trendlines = trendlines(races)
+
+    def driver(self, name):
+        return self.drivers[name]
+
+    def season(self, name, year):
+        return self.season_points.get((name, year), 0.0)
+
+    def trendline(self, name):
+        return self.trendlines.get(name)
+
+# --------------------------------------------- grid vs result trendline ---------------------------------------------
+
+def trendlines(races, x='GridPosition', y='Position'):
+    # ordinary least squares of y on x (with intercept) for every driver at once, from grouped
+    # sums instead of a statsmodels fit per request; returns {driver: (slope, intercept, r2)}
+    fit = races[['FullName', x, y]].dropna()
+    xs = fit[x].astype('float64')
+    ys = fit[y].astype('float64')
+    sums = pd.DataFrame({'n': 1.0, 'x': xs, 'y': ys, 'xx': xs * xs, 'xy': xs * ys, 'yy': ys * ys}).groupby(fit['FullName'], sort=False, observed=True).sum()
+    mean_x = sums['x'] / sums['n']
+    mean_y = sums['y'] / sums['n']
+    sxx = sums['xx'] - sums['n'] * mean_x * mean_x
+    sxy = sums['xy'] - sums['n'] * mean_x * mean_y
+    syy = sums['yy'] - sums['n'] * mean_y * mean_y
+    result = {}
+    for name in sums.index:
+        if sxx[name] > 1e-12:
+            slope = sxy[name] / sxx[name]
+            intercept = mean_y[name] - slope * mean_x[name]
+            rsquared = sxy[name] * sxy[name] / (sxx[name] * syy[name]) if syy[name] > 1e-12 else float('nan')
+        else:
+            # every x is the same: take the minimum-norm solution, as the pseudo-inverse does
+            c = mean_x[name]
+            intercept = mean_y[name] / (1 + c * c)
+            slope = mean_y[name] * c / (1 + c * c)
+            rsquared = 0.0 if syy[name] > 1e-12 else float('nan')
+        result[name] = (float(slope), float(intercept), float(rsquared))
+    return result
+
+if __name__ == "__main__":
+    files = paths()
+    write_columnar(pd.read_csv(files["races_csv"]), pd.read_csv(files["drivers_csv"]))
+    print(f"wrote {files['races']} and {files['drivers']}")
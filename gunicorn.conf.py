@@ -0,0 +1,29 @@
+# --------------------------------------------- gunicorn settings ---------------------------------------------
+#
+# gunicorn reads this file from the working directory, so the Procfile's `gunicorn app:server`
+# picks it up; command line options still override it.
+#
+# With F1_PRELOAD the master imports app.py, loads the data and the prerendered outputs once
+# and forks the workers from it, so they share those pages copy-on-write instead of each
+# loading its own copy. Code changes then need a full restart, a HUP does not reload them.
+#
+# F1_THREADS sets the request threads per worker.
+
+import gc
+
+import settings
+
+preload_app = settings.PRELOAD
+# with more than one thread gunicorn runs the gthread worker; see pool.py for the figure pool
+threads = settings.THREADS
+
+def when_ready(server):
+    # runs in the master after the app is loaded and before the first fork; frozen objects are
+    # never visited by the garbage collector, whose writes would unshare their pages in every worker
+    if preload_app:
+        # app.py leaves plotly to the first figure; build one here so the workers share it too
+        import plotly.express  # noqa: F401
+        import plotly.graph_objects
+        plotly.graph_objects.Figure()
+        gc.collect()
+        gc.freeze()
@@ -0,0 +1,74 @@
+# --------------------------------------------- image variants ---------------------------------------------
+#
+# Writes resized AVIF, WebP and PNG copies of every driver profile picture and flag under
+# assets/img/, plus assets/img/manifest.json listing the variants of each source image.
+# app.py builds responsive <picture> elements from the manifest and falls back to the
+# original png for images it does not list. Runs on Heroku in bin/post_compile; only files
+# whose source changed are re-encoded.
+#
+#   python images.py [--assets assets]
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from PIL import Image
+
+WIDTHS = {"profiles": [160, 320, 480, 640], "flags": [32, 64]}
+FALLBACK_WIDTH = {"profiles": 320, "flags": 64} # the one png kept for browsers without webp
+FORMATS = {"avif": {"quality": 50, "speed": 8}, "webp": {"quality": 80, "method": 4}, "png": {"optimize": True}}
+
+def target_widths(width, widths):
+    # never upscale; an image smaller than every width is only re-encoded
+    return sorted({min(target, width) for target in widths})
+
+def encode(image, path, fmt):
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    image.save(path, fmt.upper(), **FORMATS[fmt])
+
+def variants(assets, kind, name):
+    source = os.path.join(assets, kind, name)
+    stem = os.path.splitext(name)[0]
+    with open(source, "rb") as f:
+        # variants are named after the source's content, so a replaced picture is re-encoded
+        stamp = hashlib.sha1(f.read()).hexdigest()[:8]
+    with Image.open(source) as original:
+        original = original.convert("RGBA")
+        width, height = original.size
+        entry = {"width": width, "height": height, "variants": {fmt: [] for fmt in FORMATS}}
+        fallback = min(width, FALLBACK_WIDTH[kind])
+        for target in target_widths(width, WIDTHS[kind]):
+            resized = original if target == width else original.resize((target, round(height * target / width)), Image.LANCZOS)
+            for fmt in FORMATS:
+                if fmt == "png" and target != fallback:
+                    continue
+                path = f"img/{kind}/{stem}-{stamp}-{target}.{fmt}"
+                encode(resized, os.path.join(assets, path), fmt)
+                entry["variants"][fmt].append([path, target])
+    return entry
+
+def build(assets):
+    manifest = {}
+    for kind in WIDTHS:
+        for name in sorted(os.listdir(os.path.join(assets, kind))):
+            if name.endswith(".png"):
+                manifest[f"{kind}/{name}"] = variants(assets, kind, name)
+    with open(os.path.join(assets, "img", "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write resized AVIF/WebP/PNG variants of the profile pictures and flags.")
+    parser.add_argument("--assets", default="assets")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build(args.assets)
+    files = [os.path.join(args.assets, path) for entry in manifest.values() for paths in entry["variants"].values() for path, _ in paths]
+    sources = sum(os.path.getsize(os.path.join(args.assets, source)) for source in manifest)
+    print(f"{len(manifest)} images, {len(files)} variants ({sum(os.path.getsize(f) for f in files) / 1048576:.1f} MB, "
+        f"sources {sources / 1048576:.1f} MB) in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,229 @@
+# --------------------------------------------- figure cache ---------------------------------------------
+#
+# The data only changes between ingestion runs, so a callback's output is fully determined by
+# the dataset version and its inputs. Outputs are kept as serialised JSON in a bounded LRU;
+# a hit skips pandas, Plotly and figure validation and only parses the stored JSON.
+#
+# prerender.py renders every output for every driver and year ahead of time into one gzipped
+# file; load_prerendered() puts those outputs in front of the LRU, so only states the build
+# did not know about are computed live.
+#
+# The prerendered outputs are packed into one contiguous buffer (PackedBlobs) rather than kept
+# as a string each: reading one then never writes to a per-output object, so with gunicorn's
+# preload (gunicorn.conf.py) the workers keep sharing the master's copy instead of unsharing a
+# page on every refcount change.
+#
+# With a SharedCache (shared.py) behind the LRU, outputs rendered by one gunicorn worker are
+# hits in the others too.
+#
+# Concurrent misses of the same key are coalesced (single flight): the first caller renders,
+# the others wait for it and share its output, or its error. When everyone opens the default
+# driver at once a worker builds each of its figures once instead of once per request thread.
+# The flight lasts as long as the render, not as long as its first caller waits: after a pool
+# timeout the callers asking again wait on the build still running rather than start another.
+#
+# Outputs are written as JSON by a `serialize` function, plotly's to_json_plotly by default and
+# wire.dumps for the compact wire format, so encoded outputs are cached and prerendered as well.
+
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+def to_json(value):
+    from plotly.io.json import to_json_plotly
+    return to_json_plotly(value)
+
+class PackedBlobs:
+    # read-only {key: json} with every json in one uint8 array; get() returns a bytes copy
+
+    def __init__(self, items=()):
+        self.positions = {}
+        blobs = []
+        for key, blob in items:
+            self.positions[key] = len(blobs)
+            blobs.append(blob.encode("utf-8"))
+        self.offsets = np.cumsum([0] + [len(blob) for blob in blobs], dtype=np.int64)
+        self.buffer = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+
+    def get(self, key):
+        position = self.positions.get(key)
+        if position is None:
+            return None
+        return self.buffer[self.offsets[position]:self.offsets[position + 1]].tobytes()
+
+    def __len__(self):
+        return len(self.positions)
+
+class FigureCache:
+
+    def __init__(self, version, maxsize=1024, serialize=None, shared=None):
+        self.version = version
+        self.maxsize = maxsize
+        self.serialize = serialize or to_json
+        self.shared = shared
+        self.entries = OrderedDict()
+        self.prerendered = PackedBlobs()
+        self.functions = {}
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(self, name, args):
+        return (self.version, name) + tuple(args)
+
+    def get(self, key):
+        blob = self.lookup(key)
+        with self.lock:
+            if blob is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return blob
+
+    def lookup(self, key, count=True):
+        blob = self.prerendered.get(key)
+        if blob is not None:
+            return blob
+        with self.lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+                return blob
+        if self.shared is None:
+            return None
+        blob = self.shared.get(key, count)
+        if blob is not None:
+            self.remember(key, blob)
+        return blob
+
+    def put(self, key, blob):
+        if self.shared is not None:
+            self.shared.put(key, blob)
+        self.remember(key, blob)
+
+    def remember(self, key, blob):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = blob
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"version": self.version, "size": len(self.entries), "maxsize": self.maxsize,
+            "prerendered": len(self.prerendered), "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+            "in_flight": len(self.flights)}
+
+    def load_prerendered(self, path):
+        # header line with the dataset version, then one "name<TAB>args<TAB>json" line per output
+        if not os.path.exists(path):
+            return 0
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header["version"] != self.version:
+                logger.warning("ignoring %s: rendered for dataset %s, loaded dataset is %s", path, header["version"], self.version)
+                return 0
+            items = []
+            for line in f:
+                name, args, blob = line.rstrip("\n").split("\t", 2)
+                items.append((self.key(name, json.loads(args)), blob))
+        self.prerendered = PackedBlobs(items)
+        return len(self.prerendered)
+
+    def render(self, key, func, args):
+        value = func(*args)
+        with metrics.phase("serialize"):
+            blob = self.serialize(value)
+        self.put(key, blob)
+        return blob
+
+    def single_flight(self, key, compute, pool=None):
+        # one Future per key being rendered, in self.flights until compute() itself has finished
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Future()
+                flight.add_done_callback(functools.partial(self.land, key))
+            else:
+                self.coalesced += 1
+        if leader:
+            self.launch(key, flight, compute, pool)
+        # every caller waits with its own timeout; the render goes on when they give up
+        return pool.wait(flight) if pool is not None else flight.result()
+
+    def launch(self, key, flight, compute, pool):
+        # a render that finished since our miss has already stored its output (LRU or shared cache);
+        # the miss is counted already
+        blob = self.lookup(key, count=False)
+        if blob is not None:
+            flight.set_result(blob)
+            return
+
+        def build():
+            try:
+                flight.set_result(compute())
+            except Exception as error:
+                flight.set_exception(error)
+
+        if pool is None:
+            build()
+            return
+        try:
+            pool.submit(build)
+        except Exception as error:
+            # turned away (503): nothing will render it, so the waiters share the refusal
+            flight.set_exception(error)
+
+    def land(self, key, flight):
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+
+    def memoize(self, name, pool=None):
+        # a miss is built on pool (pool.FigurePool) when given; the output is cached by the
+        # render itself, even if every caller stopped waiting
+        def decorator(func):
+            self.functions[name] = func
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = self.key(name, args)
+                blob = self.get(key)
+                if blob is None:
+                    blob = self.single_flight(key, functools.partial(self.render, key, func, args), pool)
+                return json.loads(blob)
+            return wrapper
+        return decorator
+
+def fingerprint(paths, *values):
+    # hash of the code that draws the outputs and of anything else they depend on (the figure
+    # template), for cache versions that change on a deploy that changes how outputs look
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    for value in values:
+        digest.update(json.dumps(value, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+def write_prerendered(path, version, outputs):
+    # outputs yields (name, args, json) for every state to store
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"version": version}) + "\n")
+        for name, args, blob in outputs:
+            f.write(f"{name}\t{json.dumps(list(args))}\t{blob}\n")
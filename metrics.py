@@ -0,0 +1,158 @@
+# --------------------------------------------- callback metrics ---------------------------------------------
+#
+# Per-callback latency split into data filtering, figure construction and JSON serialisation,
+# plus the response size, kept as rolling histograms over the last WINDOW calls of each
+# callback. Recording is a perf_counter call and a deque append, so it stays on in production;
+# percentiles and buckets are only computed when /metrics is read. Every gunicorn worker keeps
+# its own numbers, and "memory" on /metrics is the answering worker's own memory.
+#
+#   @app.callback(...)
+#   @metrics.instrument
+#   def fig_scatter(chosen_driver):
+#       with metrics.phase("filter"):
+#           driver_df = index.driver(chosen_driver)
+#       ...
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, jsonify, request
+
+WINDOW = 1024
+MS_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+BYTE_BUCKETS = [1024, 4096, 16384, 65536, 262144, 1048576]
+SERIES = {"filter_ms": MS_BUCKETS, "figure_ms": MS_BUCKETS, "serialize_ms": MS_BUCKETS, "total_ms": MS_BUCKETS, "bytes": BYTE_BUCKETS}
+
+class Histogram:
+
+    def __init__(self, buckets, window=WINDOW):
+        self.buckets = buckets
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def snapshot(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return {"count": self.count, "window": 0}
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+        counts = [sum(1 for s in samples if s <= bound) for bound in self.buckets]
+        return {"count": self.count, "window": len(samples), "mean": round(sum(samples) / len(samples), 3),
+            "p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99), "max": round(samples[-1], 3),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], counts + [len(samples)]))}
+
+class Record:
+    # timings of one callback call, filled in while it runs and finished in after_request
+    __slots__ = ("name", "filter", "figure", "serialize", "returned")
+
+    def __init__(self, name):
+        self.name = name
+        self.filter = 0.0
+        self.figure = 0.0
+        self.serialize = 0.0
+        self.returned = None
+
+histograms = {}
+providers = {}
+local = threading.local()
+lock = threading.Lock()
+
+def observe(name, series, value):
+    histogram = histograms.get((name, series))
+    if histogram is None:
+        with lock:
+            histogram = histograms.setdefault((name, series), Histogram(SERIES[series]))
+    histogram.observe(value)
+
+@contextmanager
+def phase(name):
+    # time a block of a callback; "filter" and "serialize" (the figure cache writing a figure
+    # as JSON) are tracked separately, everything else in the callback counts as figure construction
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = getattr(local, "record", None)
+        if record is not None and name in ("filter", "serialize"):
+            setattr(record, name, getattr(record, name) + time.perf_counter() - start)
+
+def instrument(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        record = Record(name)
+        local.record = record
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            local.record = None
+            record.returned = time.perf_counter()
+            record.figure = record.returned - start - record.filter - record.serialize
+            if has_request_context():
+                g.callback_record = record
+            else:
+                observe(name, "filter_ms", record.filter * 1000)
+                observe(name, "figure_ms", record.figure * 1000)
+                observe(name, "serialize_ms", record.serialize * 1000)
+    return wrapper
+
+def register(name, stats):
+    # extra counters shown on /metrics, e.g. the figure cache hit rate
+    providers[name] = stats
+
+def memory(pid="self"):
+    # resident memory of a process from /proc/<pid>/smaps_rollup (Linux), in MB: uss is what only
+    # this process holds, i.e. what another worker costs; pss adds its share of the pages shared
+    # with the gunicorn master and the other workers
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.endswith("kB\n")}
+    except OSError:
+        return None
+    return {"pid": os.getpid() if pid == "self" else pid, "rss_mb": round(fields["Rss"] / 1024, 2), "pss_mb": round(fields["Pss"] / 1024, 2),
+        "uss_mb": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 2),
+        "shared_mb": round((fields["Shared_Clean"] + fields["Shared_Dirty"]) / 1024, 2)}
+
+def snapshot():
+    callbacks = {}
+    for (name, series), histogram in list(histograms.items()):
+        callbacks.setdefault(name, {})[series] = histogram.snapshot()
+    return {"callbacks": callbacks, **{name: stats() for name, stats in providers.items()}}
+
+def init_app(server, header=False, path="/metrics"):
+
+    @server.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        record = g.get("callback_record")
+        if record is None or request.path != "/_dash-update-component":
+            return response
+        end = time.perf_counter()
+        size = response.calculate_content_length() or 0
+        # serialisation: the figure cache writing the figure as JSON, then Dash encoding the response
+        timings = {"filter_ms": record.filter * 1000, "figure_ms": record.figure * 1000,
+            "serialize_ms": (record.serialize + end - record.returned) * 1000, "total_ms": (end - g.request_start) * 1000}
+        for series, value in timings.items():
+            observe(record.name, series, value)
+        observe(record.name, "bytes", size)
+        if header:
+            parts = [f"{series[:-3]}={value:.2f}" for series, value in timings.items()]
+            response.headers["X-Callback-Timing"] = f"callback={record.name};" + ";".join(parts) + f";bytes={size}"
+        return response
+
+    @server.route(path)
+    def metrics_endpoint():
+        return jsonify(snapshot())
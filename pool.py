@@ -0,0 +1,87 @@
+# --------------------------------------------- figure pool ---------------------------------------------
+#
+# With F1_FIGURE_THREADS the figure callbacks that miss the cache build and serialise their
+# figures on a small pool of threads per worker, so a burst of slow figures (a cold cache, an
+# unknown dataset) cannot take every request thread of a gthread worker (F1_THREADS) and leave
+# the cards and pictures queued behind it:
+#
+#   - at most `threads` figures are built at once and `queue` more wait for a thread; a figure
+#     beyond that is turned away straight away with 503 and Retry-After (back-pressure)
+#   - a callback waits `timeout` seconds for its figure and then answers 504; the build goes on
+#     and lands in the figure cache, and callbacks asking for it meanwhile wait on that build
+#
+#   figure_pool = FigurePool(threads=2, queue=4, timeout=10)
+#   @figure_cache.memoize("fig_scatter", pool=figure_pool)
+#
+# Threads rather than processes: a worker with request threads cannot fork safely, and spawned
+# processes would each load their own copy of the data. The builds share the GIL, which still
+# hands the light callbacks a turn every few milliseconds.
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from werkzeug.exceptions import GatewayTimeout, ServiceUnavailable
+
+import metrics
+
+RETRY_AFTER = 1
+
+class FigurePool:
+
+    def __init__(self, threads, queue=4, timeout=10.0):
+        self.threads = threads
+        self.queue = queue
+        self.timeout = timeout
+        # threads only start with the first figure, i.e. in the gunicorn worker, not the master
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="figure") if threads > 0 else None
+        self.slots = threading.BoundedSemaphore(threads + queue) if threads > 0 else None
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def submit(self, compute):
+        # the Future of compute(), or 503 when `threads + queue` figures are already pending
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(compute())
+            except Exception as error:
+                future.set_exception(error)
+            return future
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise ServiceUnavailable("too many figures are being built, try again", retry_after=RETRY_AFTER)
+        # the pool thread adds its filter time to the calling callback's metrics record
+        record = getattr(metrics.local, "record", None)
+
+        def task():
+            metrics.local.record = record
+            try:
+                return compute()
+            finally:
+                metrics.local.record = None
+                with self.lock:
+                    self.pending -= 1
+                self.slots.release()
+
+        with self.lock:
+            self.pending += 1
+            self.submitted += 1
+        return self.executor.submit(task)
+
+    def wait(self, future):
+        # the result of a figure being built, or 504 after `timeout` seconds; the build goes on
+        try:
+            return future.result(timeout=self.timeout if self.executor is not None else None)
+        except FutureTimeout:
+            with self.lock:
+                self.timeouts += 1
+            raise GatewayTimeout(f"the figure took longer than {self.timeout:g}s, it will be cached when done")
+
+    def stats(self):
+        return {"threads": self.threads, "queue": self.queue, "timeout_s": self.timeout, "pending": self.pending,
+            "submitted": self.submitted, "rejected": self.rejected, "timeouts": self.timeouts}
@@ -0,0 +1,36 @@
+# --------------------------------------------- prerender every dashboard state ---------------------------------------------
+#
+# Renders the output of every cached callback for every driver in driver_options and every
+# year in year_options into settings.PRERENDERED. app.py serves these directly and only
+# computes states that are missing (new drivers, or a file built for other data).
+#
+#   python prerender.py [--output data/prerendered.jsonl.gz]
+
+import argparse
+import inspect
+import itertools
+import time
+
+import app
+import memo
+import settings
+
+def arguments(func, drivers=None):
+    # the inputs a callback takes decide which options it is rendered for
+    options = {"chosen_driver": drivers or app.driver_options, "chosen_year": app.year_options}
+    params = list(inspect.signature(func).parameters)
+    return itertools.product(*(options[param] for param in params))
+
+def states():
+    for name, func in app.figure_cache.functions.items():
+        for args in arguments(func):
+            yield name, args, app.figure_cache.serialize(func(*args))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prerender every callback output of the dashboard.")
+    parser.add_argument("--output", default=settings.PRERENDERED)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    memo.write_prerendered(args.output, app.figure_cache.version, states())
+    print(f"wrote {args.output} for dataset {app.figure_cache.version} in {time.perf_counter() - start:.1f}s")
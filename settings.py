@@ -0,0 +1,28 @@
+# --------------------------------------------- runtime settings ---------------------------------------------
+#
+# Everything the dashboard reads from the environment lives here, so a deployment can be
+# tuned from the Procfile or the Heroku config without code changes.
+
+import os
+
+def flag(name, default):
+    return os.environ.get(name, "1" if default else "0").lower() in ("1", "true", "yes", "on")
+
+DATA_DIR = os.environ.get("F1_DATA_DIR", "data")
+
+FIGURE_CACHE_SIZE = int(os.environ.get("F1_FIGURE_CACHE_SIZE", "1024")) # cached callback outputs per worker, 0 disables
+PRERENDERED = os.environ.get("F1_PRERENDERED", os.path.join(DATA_DIR, "prerendered.jsonl.gz")) # written by prerender.py
+TIMING_HEADER = flag("F1_TIMING_HEADER", False) # add X-Callback-Timing to every callback response
+BATCHED_CALLBACKS = flag("F1_BATCHED_CALLBACKS", False) # one callback per dropdown instead of one per chart group
+CLIENTSIDE_SEASON = flag("F1_CLIENTSIDE_SEASON", False) # year views drawn in the browser from the driver's rows
+COMPACT_FIGURES = flag("F1_COMPACT_FIGURES", False) # figures sent without the template, with packed arrays (wire.py)
+COMPRESS = flag("F1_COMPRESS", True) # brotli/gzip for callback responses, layout and index (flask-compress)
+LAZY_GRAPHS = flag("F1_LAZY_GRAPHS", False) # graph callbacks wait until the graph is scrolled into view or the page is idle
+TWITTER_EMBED = os.environ.get("F1_TWITTER_EMBED", "idle") # load the timeline when idle or pointed at, on "click" only, or "off"
+PRELOAD = flag("F1_PRELOAD", False) # gunicorn loads the app once in the master and forks the workers from it (gunicorn.conf.py)
+THREADS = int(os.environ.get("F1_THREADS", "1")) # gunicorn request threads per worker (gunicorn.conf.py), gthread when above 1
+FIGURE_THREADS = int(os.environ.get("F1_FIGURE_THREADS", "0")) # threads per worker building figures that miss the cache, 0 builds on the request thread
+FIGURE_QUEUE = int(os.environ.get("F1_FIGURE_QUEUE", "4")) # figures waiting for a pool thread before more are turned away with 503
+FIGURE_TIMEOUT = float(os.environ.get("F1_FIGURE_TIMEOUT", "10")) # seconds a callback waits for its figure before answering 504
+SHARED_CACHE = os.environ.get("F1_SHARED_CACHE", "") # SQLite file of rendered outputs shared by the workers on a machine (shared.py), empty for none
+SHARED_CACHE_MB = float(os.environ.get("F1_SHARED_CACHE_MB", "256")) # size the shared cache is trimmed back under
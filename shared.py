@@ -0,0 +1,177 @@
+# --------------------------------------------- shared figure cache ---------------------------------------------
+#
+# With F1_SHARED_CACHE=<path> the serialised callback outputs are also kept in a SQLite file
+# that every gunicorn worker on the machine reads, so an output rendered by one worker is a hit
+# in all the others (and after a restart), where each worker's LRU in memo.py would render it
+# again. Entries are keyed by the figure cache key, i.e. the dataset version, a fingerprint of
+# the code and template that draw the outputs (memo.fingerprint) and the callback inputs, so a
+# deploy that changes figures does not serve the old ones; entries of other versions are
+# dropped when a worker opens the file.
+#
+# The file is bounded by size: once the outputs exceed max_bytes the least recently used are
+# deleted down to 90%. The number and size of the entries are kept in a one-row totals table
+# in the same transaction as each write, so neither a write nor /metrics scans the file. Reads
+# are plain SELECTs in WAL mode and never wait for a writer; the last-used time of an entry is
+# refreshed at most every TOUCH_INTERVAL seconds per worker. Any SQLite error counts as a miss,
+# the callback is then rendered as if the cache were off.
+#
+#   shared = SharedCache("/tmp/f1-figures.sqlite", max_bytes=256 * 2**20, version=figure_cache.version)
+#   FigureCache(version, shared=shared)
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TOUCH_INTERVAL = 60
+LOW_WATER = 0.9
+
+# bumped when the tables change: a file of another layout is emptied and laid out again
+SCHEMA_VERSION = 2
+# size and used before blob so they are read without the blob's overflow pages
+SCHEMA = """
+DROP TABLE IF EXISTS outputs;
+DROP TABLE IF EXISTS totals;
+CREATE TABLE outputs (key TEXT PRIMARY KEY, version TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL, blob BLOB NOT NULL);
+CREATE INDEX outputs_used ON outputs (used, size);
+CREATE TABLE totals (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, size INTEGER NOT NULL);
+INSERT INTO totals VALUES (0, 0, 0);
+"""
+
+class SharedCache:
+
+    def __init__(self, path, max_bytes, version):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.local = threading.local()
+        self.inherited = []
+        self.lock = threading.Lock()
+        self.touched = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        # a connection of its own, closed again: with F1_PRELOAD this runs in the gunicorn master,
+        # and no SQLite handle may be open there when it forks the workers
+        db = self.open()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for statement in filter(str.strip, SCHEMA.split(";")):
+                    db.execute(statement)
+                db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            if db.execute("DELETE FROM outputs WHERE version != ?", (version,)).rowcount:
+                db.execute("UPDATE totals SET (entries, size) = (SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outputs)")
+            db.execute("COMMIT")
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def open(self):
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def connection(self):
+        # one connection per thread of the process that uses it
+        db = getattr(self.local, "db", None)
+        if db is None or self.local.pid != os.getpid():
+            # a handle that crossed fork() is left open rather than closed: closing it in the
+            # child would release the parent's locks
+            if db is not None:
+                self.inherited.append(db)
+            db = self.open()
+            self.local.db = db
+            self.local.pid = os.getpid()
+        return db
+
+    def error(self, action, error):
+        with self.lock:
+            self.errors += 1
+            first = self.errors == 1
+        if first:
+            logger.warning("shared cache %s: %s failed: %s", self.path, action, error)
+
+    def get(self, key, count=True):
+        # count=False for a second look at a key already counted (memo.FigureCache.launch)
+        key = json.dumps(key)
+        try:
+            row = self.connection().execute("SELECT blob FROM outputs WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as error:
+            self.error("read", error)
+            return None
+        with self.lock:
+            if row is None:
+                self.misses += count
+                return None
+            self.hits += count
+            now = time.time()
+            touch = now - self.touched.get(key, 0) > TOUCH_INTERVAL
+            if touch:
+                self.touched[key] = now
+        if touch:
+            try:
+                self.connection().execute("UPDATE outputs SET used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as error:
+                self.error("touch", error)
+        return row[0]
+
+    def put(self, key, blob):
+        if isinstance(blob, str):
+            blob = blob.encode("utf-8")
+        key = json.dumps(key)
+        try:
+            db = self.connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                old = db.execute("SELECT size FROM outputs WHERE key = ?", (key,)).fetchone()
+                db.execute("INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?)", (key, self.version, len(blob), time.time(), blob))
+                db.execute("UPDATE totals SET entries = entries + ?, size = size + ?",
+                    (old is None, len(blob) - (old[0] if old else 0)))
+                evicted = self.evict(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as error:
+            self.error("write", error)
+            return
+        with self.lock:
+            self.writes += 1
+            self.evictions += evicted
+
+    def evict(self, db):
+        total = db.execute("SELECT size FROM totals").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        excess = total - self.max_bytes * LOW_WATER
+        rows, freed = [], 0
+        # read from the (used, size) index alone
+        for rowid, size in db.execute("SELECT rowid, size FROM outputs ORDER BY used"):
+            if freed >= excess:
+                break
+            rows.append((rowid,))
+            freed += size
+        db.executemany("DELETE FROM outputs WHERE rowid = ?", rows)
+        db.execute("UPDATE totals SET entries = entries - ?, size = size - ?", (len(rows), freed))
+        return len(rows)
+
+    def stats(self):
+        try:
+            entries, size = self.connection().execute("SELECT entries, size FROM totals").fetchone()
+        except sqlite3.Error as error:
+            self.error("stats", error)
+            entries, size = None, None
+        return {"path": self.path, "max_mb": round(self.max_bytes / 2**20, 1), "entries": entries,
+            "mb": None if size is None else round(size / 2**20, 2), "hits": self.hits, "misses": self.misses,
+            "writes": self.writes, "evictions": self.evictions, "errors": self.errors}
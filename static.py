@@ -0,0 +1,102 @@
+# --------------------------------------------- compression and asset caching ---------------------------------------------
+#
+# Callback responses, the layout and the index are compressed with brotli or gzip, whichever
+# the browser accepts (flask-compress). Everything under assets/ is linked with a content hash,
+# `assets/profiles/Carlos Sainz.png?v=<sha1>`, and a request carrying the current hash is
+# answered as immutable for a year; anything else (an old hash, no hash) is revalidated
+# against the ETag on every use, so a changed file is never served stale.
+#
+#   static.init_app(app, compress=True)
+#   driver_pic = static.url(f"profiles/{chosen_driver}.png")
+#
+# images.py writes resized AVIF/WebP/PNG variants of the pictures and flags with a manifest;
+# variants() looks an image up there, returning the hashed urls and widths per format.
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from urllib.parse import quote
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE = 31536000
+ASSET_LINK = re.compile(r'/assets/([^"?]+)\?m=[0-9.]+')
+
+folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+hashes = {}
+manifest = None
+lock = threading.Lock()
+
+def digest(path):
+    # content hash of assets/<path>, read once per worker; None if there is no such file
+    if path not in hashes:
+        try:
+            with open(os.path.join(folder, path), "rb") as f:
+                value = hashlib.sha1(f.read()).hexdigest()[:12]
+        except OSError:
+            value = None
+        with lock:
+            hashes[path] = value
+    return hashes[path]
+
+def url(path):
+    # quoted, since srcset separates candidates with spaces
+    version = digest(path)
+    return f"assets/{quote(path)}?v={version}" if version else f"assets/{quote(path)}"
+
+def variants(path):
+    # {"avif": [(url, width), ...], "webp": [...], "png": [...]} for assets/<path>, None if unlisted
+    global manifest
+    if manifest is None:
+        try:
+            with open(os.path.join(folder, "img", "manifest.json")) as f:
+                manifest = json.load(f)
+        except OSError:
+            manifest = {}
+    entry = manifest.get(path)
+    if entry is None:
+        return None
+    return {fmt: [(url(variant), width) for variant, width in candidates] for fmt, candidates in entry["variants"].items()}
+
+def enable_compression(server):
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        logger.warning("flask-compress is not installed, responses are sent uncompressed")
+        return
+    server.config.setdefault("COMPRESS_ALGORITHM", ["br", "gzip"])
+    server.config.setdefault("COMPRESS_BR_LEVEL", 4)
+    server.config.setdefault("COMPRESS_LEVEL", 6)
+    Compress(server)
+
+def init_app(app, compress=True):
+    global folder
+    folder = app.config.assets_folder
+    server = app.server
+    if compress:
+        enable_compression(server)
+
+    # Dash links the css and js in assets/ with ?m=<mtime>; link them by content hash instead
+    interpolate_index = app.interpolate_index
+    def hashed_index(**kwargs):
+        return ASSET_LINK.sub(lambda match: "/" + url(match.group(1)), interpolate_index(**kwargs))
+    app.interpolate_index = hashed_index
+
+    @server.after_request
+    def cache_assets(response):
+        if not request.path.startswith("/assets/") or response.status_code not in (200, 304):
+            return response
+        version = request.args.get("v")
+        if version and version == digest(request.path[len("/assets/"):]):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
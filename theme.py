@@ -0,0 +1,56 @@
+# --------------------------------------------- figure template ---------------------------------------------
+#
+# Every figure is drawn with the dash-bootstrap-templates "DARKLY" template (which, as that
+# name has no json of its own there, is its bootstrap template). Registering it the usual way,
+# load_figure_template(), runs the whole template through plotly's validators, which is most
+# of a worker's start-up time. `python theme.py` (bin/post_compile) writes the template as
+# plotly has validated it to figure_template.json; install() registers that file unvalidated,
+# the way plotly registers its own built-in templates, so the validation happens when (and in
+# the worker where) a figure is first built, which with prerendered outputs may be never. It
+# falls back to load_figure_template() when the file is missing.
+#
+#   theme.install()
+#   dcc.Store(id="figure_template", data=theme.template())
+
+import json
+import logging
+import os
+
+import plotly.io as pio
+
+logger = logging.getLogger(__name__)
+
+NAME = "DARKLY"
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "figure_template.json")
+
+precompiled = None
+
+def build():
+    # what app.py used to do at import
+    from dash_bootstrap_templates import load_figure_template
+    pio.templates.default = "plotly_dark"
+    load_figure_template(NAME)
+    return pio.templates[NAME].to_plotly_json()
+
+def install(path=PATH):
+    global precompiled
+    try:
+        with open(path) as f:
+            precompiled = json.load(f)
+    except OSError:
+        logger.info("%s not found, validating the figure template at start-up (python theme.py writes it)", path)
+        precompiled = build()
+        return
+    from plotly.graph_objs.layout import Template
+    # the registry's own attributes: its setters would validate the template all over again
+    pio.templates._templates[NAME] = Template(precompiled, _validate=False)
+    pio.templates._default = NAME
+
+def template():
+    # the template as plain json, for figures drawn or decoded in the browser
+    return precompiled
+
+if __name__ == "__main__":
+    with open(PATH, "w") as f:
+        json.dump(build(), f, separators=(",", ":"))
+    print(f"wrote {PATH}")
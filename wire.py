@@ -0,0 +1,81 @@
+# --------------------------------------------- compact figure wire format ---------------------------------------------
+#
+# With F1_COMPACT_FIGURES the figure outputs go to the browser in a smaller encoding that
+# assets/wire.js turns back into the exact JSON a plain response would have carried:
+#
+#   - layout.template is left out; the browser gets it once with the layout (figure_template)
+#   - numeric arrays become {"dtype": "i1", "bdata": <base64>} in the smallest dtype that
+#     holds every value exactly; nulls are stored as NaN
+#   - string arrays with repeated values become {"dtype": "dict", "values": [...], "codes": <numeric array>}
+#
+# Arrays shorter than MIN_LENGTH stay plain JSON, where the wrapper would cost more than it saves.
+
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+
+FORMAT = "wire1"
+MIN_LENGTH = 8
+INT_DTYPES = ["i1", "u1", "i2", "u2", "i4"]
+
+def typed(array, code):
+    # little-endian, as the typed arrays in the browser read it
+    return {"dtype": code, "bdata": base64.b64encode(array.astype("<" + code).tobytes()).decode("ascii")}
+
+def numeric_array(values):
+    array = np.array([np.nan if value is None else value for value in values], dtype="float64")
+    if not np.isnan(array).any() and (array == np.round(array)).all():
+        for code in INT_DTYPES:
+            info = np.iinfo(code)
+            if info.min <= array.min() and array.max() <= info.max:
+                return typed(array, code)
+    if (array.astype("float32") == array)[~np.isnan(array)].all():
+        return typed(array, "f4")
+    return typed(array, "f8")
+
+def string_array(values):
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=False)
+    if len(uniques) == len(values):
+        return values
+    return {"dtype": "dict", "values": list(uniques), "codes": numeric_array(codes)}
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def encode_value(value):
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if not isinstance(value, list):
+        return value
+    if len(value) >= MIN_LENGTH:
+        if all(item is None or is_number(item) for item in value) and any(item is not None for item in value):
+            return numeric_array(value)
+        if all(isinstance(item, str) for item in value):
+            return string_array(value)
+    return [encode_value(item) for item in value]
+
+def encode_figure(figure):
+    # works on the serialised figure, so decoding gives back exactly what to_json_plotly wrote
+    from plotly.io.json import to_json_plotly
+    plain = json.loads(to_json_plotly(figure))
+    layout = plain.get("layout", {})
+    layout.pop("template", None)
+    return {"data": encode_value(plain.get("data", [])), "layout": layout}
+
+def encode(value):
+    # callback return value -> the same value with every figure in it encoded
+    from plotly.basedatatypes import BaseFigure
+    if isinstance(value, BaseFigure):
+        return encode_figure(value)
+    if isinstance(value, tuple):
+        return tuple(encode(item) for item in value)
+    return value
+
+def dumps(value):
+    # the JSON of encode(value); an encoded figure is plain JSON already, so it is written by the
+    # json module and only what plotly's encoder knows about (components, numpy values) goes
+    # through it, rather than serialising every figure a second time with to_json_plotly
+    from plotly.utils import PlotlyJSONEncoder
+    return json.dumps(encode(value), separators=(",", ":"), default=PlotlyJSONEncoder().default)